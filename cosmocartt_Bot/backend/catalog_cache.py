@@ -0,0 +1,136 @@
+"""
+Read-through cache for catalog reads.
+
+The catalog changes a few times a day, yet every `/products`, `/products/{id}`,
+`/categories` and chat lookup went to the database. `CatalogCache` keeps, per namespace:
+
+- `product`: full product rows by id (any `fields=` projection is cut from the cached row);
+  `/products/batch` and the chat agent fetch only the ids missing here
+- `query`: finished `/products` responses (JSON body plus headers) keyed by the normalized
+  filters, so a hit skips the query and the serialization
+- `facets`: finished `/products/facets` bodies, keyed the same way
+- `categories`: the category list
+
+Entries are evicted least-recently-used first once the cache holds `max_bytes` of
+serialized data (`CATALOG_CACHE_MAX_BYTES`, default 64 MB); a single entry larger than an
+eighth of that is not kept. Every entry is tagged with the catalog version (see
+`catalog_version`): when an import script or admin write bumps it, the first read in each
+worker process that sees the new version drops everything.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+
+from fast_response import dumps
+
+
+def normalize_search(search: Optional[str]) -> Optional[str]:
+    """Case and whitespace variants of a search share one cache entry."""
+    if search is None:
+        return None
+    return " ".join(search.lower().split())
+
+
+class CatalogCache:
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "CatalogCache":
+        return cls(max_bytes=int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 << 20))))
+
+    def _current(self, version: int) -> bool:
+        """Advance to `version` (dropping every entry) if it is newer; False for a reader
+        still on an older version. Caller holds the lock."""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+        return version == self._version
+
+    def get(self, namespace: str, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((namespace, key)) if self._current(version) else None
+            if entry is None:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+            return entry[0]
+
+    def get_many(self, namespace: str, keys: Iterable[Hashable], version: int) -> Dict[Hashable, Any]:
+        """{key: value} for the cached keys among `keys`, under one lock acquisition."""
+        found = {}
+        with self._lock:
+            current = self._current(version)
+            for key in keys:
+                entry = self._entries.get((namespace, key)) if current else None
+                if entry is None:
+                    self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                    continue
+                self._entries.move_to_end((namespace, key))
+                self.hits[namespace] = self.hits.get(namespace, 0) + 1
+                found[key] = entry[0]
+        return found
+
+    def put(self, namespace: str, key: Hashable, version: int, value: Any, size: Optional[int] = None):
+        """Store `value`; `size` defaults to its serialized JSON length."""
+        if size is None:
+            size = len(dumps(value))
+        if size > self.max_bytes // 8:
+            return
+        with self._lock:
+            if not self._current(version):
+                return
+            old = self._entries.pop((namespace, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(namespace, key)] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def get_or_load(self, namespace: str, key: Hashable, version: int, loader: Callable[[], Any],
+                    size: Optional[Callable[[Any], int]] = None) -> Any:
+        """Cached value, or `loader()` stored for next time (None results aren't cached)."""
+        value = self.get(namespace, key, version)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.put(namespace, key, version, value, size(value) if size else None)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_namespace = {}
+            for (namespace, _), (_, size) in self._entries.items():
+                ns = per_namespace.setdefault(namespace, {"entries": 0, "bytes": 0})
+                ns["entries"] += 1
+                ns["bytes"] += size
+            for namespace in set(self.hits) | set(self.misses):
+                ns = per_namespace.setdefault(namespace, {"entries": 0, "bytes": 0})
+                hits, misses = self.hits.get(namespace, 0), self.misses.get(namespace, 0)
+                ns.update(hits=hits, misses=misses, hit_rate=round(hits / (hits + misses), 4) if hits + misses else 0.0)
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "namespaces": per_namespace,
+            }
@@ -0,0 +1,201 @@
+"""
+Process-wide catalog context for the chat agent.
+
+Every chat turn used to run `SELECT DISTINCT category` plus a product sample before even
+calling the LLM. `CatalogContext` builds that context once per process and shares it
+across requests: categories, sub-categories per category, the category tree served by
+`/subcategories` (each sub-category's product count and image, with ETags), brands, the product-name
+vocabulary (for speculative prefetch), the product sample embedded in the LLM prompt and
+a `TrigramIndex` over every product name for fuzzy name resolution, a `SpellingIndex` for
+"did you mean" on searches that found nothing and, when numpy/scipy are installed, a
+`TfidfIndex` for vectorized name similarity.
+
+The snapshot is rebuilt when the catalog version changes (see `catalog_version`) or after
+`CATALOG_CONTEXT_TTL_SECONDS` (default 300). One request rebuilds; concurrent requests keep
+using the previous snapshot meanwhile. The trigram index is synced incrementally on
+rebuild, so only added, renamed or removed products are re-indexed; the TF-IDF matrix and
+the spelling index are rebuilt only when that sync saw changes.
+"""
+
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import os
+import json
+import hashlib
+import time
+import threading
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+import models
+from catalog_version import get_catalog_version
+from prefetch import build_vocabulary
+from trigram_index import TrigramIndex
+from tfidf_index import TfidfIndex
+from spelling import SpellingIndex
+from utils import conjunction_pairs
+
+
+def _etag(payload) -> str:
+    return '"%s"' % hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def build_category_tree(db: Session) -> Dict[str, List[dict]]:
+    """category -> [{name, image, count}] per sub-category, in one windowed query: the
+    representative image is the first product (by index) that has one."""
+    P = models.Product
+    partition = (P.category, P.sub_category)
+    no_image = case((func.coalesce(P.image_url, "") == "", 1), else_=0)
+    ranked = db.query(
+        P.category, P.sub_category, P.image_url,
+        func.row_number().over(partition_by=partition, order_by=(no_image, P.index)).label("rn"),
+        func.count().over(partition_by=partition).label("n"),
+    ).filter(P.category.isnot(None), P.sub_category.isnot(None), P.sub_category != "").subquery()
+    rows = db.query(ranked.c.category, ranked.c.sub_category, ranked.c.image_url, ranked.c.n) \
+        .filter(ranked.c.rn == 1).order_by(ranked.c.category, ranked.c.sub_category)
+    tree: Dict[str, List[dict]] = {}
+    for category, sub_category, image, count in rows:
+        tree.setdefault(category, []).append({"name": sub_category, "image": image, "count": count})
+    return tree
+
+
+class CatalogSnapshot:
+    def __init__(self, version: int, categories: List[str], sub_categories: Dict[str, List[str]],
+                 brands: List[str], vocabulary: FrozenSet[str], sample_products: List[str], product_count: int,
+                 product_index: TrigramIndex, similarity_index: Optional[TfidfIndex] = None,
+                 spelling: Optional[SpellingIndex] = None, category_tree: Optional[Dict[str, List[dict]]] = None,
+                 compounds: FrozenSet[str] = frozenset()):
+        self.version = version
+        self.categories = categories
+        self.sub_categories = sub_categories
+        self.brands = brands
+        self.vocabulary = vocabulary
+        self.sample_products = sample_products
+        self.product_count = product_count
+        self.product_index = product_index
+        self.similarity_index = similarity_index
+        self.spelling = spelling
+        self.category_tree = category_tree or {}
+        # "mac and cheese" style pairs, so the intent parser doesn't split product names
+        self.compounds = compounds
+        # Content hashes, so an unchanged tree keeps its ETags across rebuilds
+        self.category_etags = {c: _etag(subs) for c, subs in self.category_tree.items()}
+        self.tree_etag = _etag(self.category_tree)
+        self.built_at = time.monotonic()
+
+    def subcategories(self, category: str) -> Tuple[str, List[dict]]:
+        """(ETag, [{name, image, count}]) for one category; empty for unknown ones."""
+        subs = self.category_tree.get(category, [])
+        return self.category_etags.get(category) or _etag(subs), subs
+
+
+class CatalogContext:
+    def __init__(self, ttl_seconds: float = 300, sample_size: int = 30):
+        self.ttl_seconds = ttl_seconds
+        self.sample_size = sample_size
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.product_index = TrigramIndex()
+        self.similarity_index: Optional[TfidfIndex] = None
+        self.spelling: Optional[SpellingIndex] = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.hits = 0
+
+    @classmethod
+    def from_env(cls) -> "CatalogContext":
+        return cls(ttl_seconds=float(os.getenv("CATALOG_CONTEXT_TTL_SECONDS", "300")))
+
+    def _fresh(self, snapshot: Optional[CatalogSnapshot], version: int) -> bool:
+        return (snapshot is not None and snapshot.version == version
+                and time.monotonic() - snapshot.built_at < self.ttl_seconds)
+
+    def _build(self, db: Session, version: int) -> CatalogSnapshot:
+        # One pass over the distinct (category, sub_category, brand) triples...
+        categories, sub_categories, brands = set(), {}, set()
+        rows = db.query(models.Product.category, models.Product.sub_category, models.Product.brand).distinct()
+        for category, sub_category, brand in rows:
+            if category:
+                categories.add(category)
+                if sub_category:
+                    sub_categories.setdefault(category, set()).add(sub_category)
+            if brand:
+                brands.add(brand)
+
+        # ...and one pass over product names
+        rows = db.query(models.Product.index, models.Product.product).yield_per(5000).all()
+        vocabulary = build_vocabulary(name for _, name in rows)
+        changes = self.product_index.sync(rows)
+        if TfidfIndex.available and (changes or self.similarity_index is None):
+            self.similarity_index = TfidfIndex(rows)
+        if changes or self.spelling is None:
+            self.spelling = SpellingIndex.from_names(name for _, name in rows)
+
+        return CatalogSnapshot(
+            version=version,
+            categories=sorted(categories),
+            sub_categories={c: sorted(s) for c, s in sub_categories.items()},
+            brands=sorted(brands),
+            vocabulary=vocabulary,
+            sample_products=[name for _, name in rows[:self.sample_size]],
+            product_count=len(rows),
+            product_index=self.product_index,
+            similarity_index=self.similarity_index,
+            spelling=self.spelling,
+            category_tree=build_category_tree(db),
+            compounds=conjunction_pairs(name for _, name in rows),
+        )
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        """Current snapshot; rebuilt from `db` when stale."""
+        version = get_catalog_version(db)
+        snapshot = self._snapshot
+        if self._fresh(snapshot, version):
+            self.hits += 1
+            return snapshot
+
+        if snapshot is not None and not self._lock.acquire(blocking=False):
+            # Another request is rebuilding: serve the previous snapshot meanwhile
+            self.hits += 1
+            return snapshot
+        if snapshot is None:
+            self._lock.acquire()
+        try:
+            snapshot = self._snapshot
+            if self._fresh(snapshot, version):
+                return snapshot
+            try:
+                self._snapshot = self._build(db, version)
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                print(f"Catalog context rebuild failed, keeping version {snapshot.version}: {e}")
+                db.rollback()
+                return snapshot
+            self.rebuilds += 1
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Force a rebuild on the next `get` (e.g. right after a catalog import)."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot.built_at = float("-inf")
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        stats = {"rebuilds": self.rebuilds, "hits": self.hits, "ttl_seconds": self.ttl_seconds}
+        if snapshot is not None:
+            stats.update(
+                version=snapshot.version,
+                age_seconds=round(time.monotonic() - snapshot.built_at, 1),
+                products=snapshot.product_count,
+                categories=len(snapshot.categories),
+                brands=len(snapshot.brands),
+                vocabulary=len(snapshot.vocabulary),
+            )
+        stats["product_index"] = self.product_index.stats()
+        if self.similarity_index is not None:
+            stats["similarity_index"] = self.similarity_index.stats()
+        if self.spelling is not None:
+            stats["spelling"] = self.spelling.stats()
+        return stats
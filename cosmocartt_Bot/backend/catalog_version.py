@@ -0,0 +1,67 @@
+"""
+Catalog version counter.
+
+A single row in `catalog_meta` holds a monotonically increasing version number. Anything
+that caches catalog-derived data (LLM intent parses, catalog snapshots, query results)
+keys on this version, and whatever changes the catalog calls `bump_catalog_version` so
+every worker process drops its stale entries.
+
+Reads are polled: the DB is consulted at most once every `CATALOG_VERSION_POLL_SECONDS`
+(default 5) per process, so checking the version is free on the hot path.
+"""
+
+from typing import Optional
+import os
+import time
+import datetime
+import threading
+
+from sqlalchemy.orm import Session
+try:
+    # Imported as `backend.catalog_version` (the maintenance scripts): reuse `backend.models`,
+    # a second flat copy would redefine its tables on the shared Base
+    from . import models
+except ImportError:
+    import models
+
+POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "5"))
+
+_lock = threading.Lock()
+_version = 0
+_checked_at = 0.0
+
+
+def get_catalog_version(db: Optional[Session] = None, force: bool = False) -> int:
+    """Return the current catalog version, re-reading it from the DB when the poll interval has passed."""
+    global _version, _checked_at
+    now = time.monotonic()
+    if db is None or (not force and now - _checked_at < POLL_SECONDS):
+        return _version
+    try:
+        value = db.query(models.CatalogMeta.version).filter(models.CatalogMeta.id == 1).scalar()
+    except Exception as e:
+        print(f"Could not read catalog version: {e}")
+        db.rollback()
+        return _version
+    with _lock:
+        _version = int(value or 0)
+        _checked_at = now
+    return _version
+
+
+def bump_catalog_version(db: Session) -> int:
+    """Increment the catalog version after a catalog write. Commits the session."""
+    global _version, _checked_at
+    # Import scripts may run before the API ever created the table
+    models.CatalogMeta.__table__.create(bind=db.get_bind(), checkfirst=True)
+    meta = db.query(models.CatalogMeta).filter(models.CatalogMeta.id == 1).with_for_update().first()
+    if meta is None:
+        meta = models.CatalogMeta(id=1, version=0)
+        db.add(meta)
+    meta.version = (meta.version or 0) + 1
+    meta.updated_at = datetime.datetime.utcnow()
+    db.commit()
+    with _lock:
+        _version = meta.version
+        _checked_at = time.monotonic()
+    return _version
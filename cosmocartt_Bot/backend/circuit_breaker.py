@@ -0,0 +1,111 @@
+"""
+Failure isolation for calls to the LLM provider.
+
+- `CircuitBreaker` stops calling a provider that keeps failing. After `failure_threshold`
+  consecutive failures it opens for a cooldown that doubles on every consecutive trip
+  (capped at `max_cooldown`), then lets a single probe through (half-open). A successful
+  probe closes it again and resets the backoff.
+- `Deadline` is a per-request time budget; callers size their timeouts from
+  `remaining()` so a slow provider can't hold a request past its budget.
+"""
+
+from typing import Optional
+import time
+import threading
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, base_cooldown: float = 2.0, max_cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = base_cooldown
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._consecutive_trips = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may go through right now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._consecutive_trips = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Free the half-open probe slot of a call that ended without an outcome
+        (cancelled), so the next caller can probe instead of being rejected forever."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                self._trip()
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        # Exponential backoff: each consecutive trip doubles the time we stay open
+        self.cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** self._consecutive_trips))
+        self._consecutive_trips += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.failures = 0
+        self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "cooldown_seconds": self.cooldown,
+            "trips": self.trips,
+            "rejected_calls": self.rejected,
+        }
+
+
+class Deadline:
+    """Monotonic time budget for a single request."""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    @staticmethod
+    def clamp(timeout: float, deadline: Optional["Deadline"]) -> float:
+        """Shrink `timeout` so it never outlives `deadline`."""
+        if deadline is None:
+            return timeout
+        return min(timeout, deadline.remaining())
@@ -0,0 +1,178 @@
+"""
+Facet counts for `/products/facets`.
+
+The storefront sidebar was assembled from `/categories`, `/subcategories` and repeated
+`/products` calls. `/products/facets` returns the first result page together with counts
+for category, sub_category, brand, price bucket, veg mark and rating band over the whole
+filtered result set. The counts come from one round trip: the rows in scope are a CTE and
+each facet is a narrow GROUP BY over it, glued with UNION ALL, so the database returns a
+few rows per facet value rather than one per product.
+
+Counts are disjunctive: each facet is counted with every active filter except its own, so
+with `brand=Amul` selected the brand list still shows what picking another brand would
+give instead of just "Amul". The CTE carries one 0/1 column per active filter for that.
+
+The price and rating labels double as filter values (`price=100-200`, `rating=4-` for 4
+and up), on `/products` as well, so a sidebar click pages through exactly the rows it
+counted. Labels avoid "+", which arrives as a space in an unencoded query string; the
+older "4+" spellings are still accepted.
+"""
+
+from typing import Dict, List, Optional
+
+from sqlalchemy import String, and_, case, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Query, Session
+import models
+
+# (low, high) sale price, high exclusive; None is open-ended
+PRICE_BUCKETS = [(0, 50), (50, 100), (100, 200), (200, 500), (500, 1000), (1000, None)]
+# (low, high) rating, high exclusive
+RATING_BANDS = [(4.0, None), (3.0, 4.0), (0.0, 3.0)]
+UNRATED = "unrated"
+
+FACETS = ("category", "sub_category", "brand", "price", "is_veg", "rating")
+
+
+def _label(low, high) -> str:
+    if high is None:
+        return f"{low:g}-"
+    return f"{low:g}-{high:g}"
+
+
+PRICE_LABELS = {_label(low, high): (low, high) for low, high in PRICE_BUCKETS}
+RATING_LABELS = {_label(low, high): (low, high) for low, high in RATING_BANDS}
+
+_PRICE = func.coalesce(models.Product.sale_price, 0.0)
+
+
+def _between(expr, low, high):
+    conditions = []
+    if low is not None:
+        conditions.append(expr >= low)
+    if high is not None:
+        conditions.append(expr < high)
+    return conditions
+
+
+def _bucket_case(expr, labels: Dict[str, tuple], else_=None):
+    whens = []
+    for label, (low, high) in labels.items():
+        conditions = _between(expr, low, high)
+        condition = conditions[0] if len(conditions) == 1 else conditions[0] & conditions[1]
+        whens.append((condition, label))
+    return case(*whens, else_=else_)
+
+
+def columns(filters: Optional[Dict[str, object]] = None) -> list:
+    """One labelled column per facet, in FACETS order, then a `match_<facet>` 0/1 column
+    for each of `filters` (facet name -> value, as from `parse_filters`, plus `category`
+    and `sub_category`)."""
+    matches = [case((condition, 1), else_=0).label(f"match_{name}")
+               for name, condition in _conditions(filters or {}).items()]
+    return [
+        models.Product.category.label("category"),
+        models.Product.sub_category.label("sub_category"),
+        models.Product.brand.label("brand"),
+        _bucket_case(_PRICE, PRICE_LABELS).label("price"),
+        models.Product.is_veg.label("is_veg"),
+        _bucket_case(models.Product.rating, RATING_LABELS, else_=UNRATED).label("rating"),
+    ] + matches
+
+
+def _open_ended(label: Optional[str]) -> Optional[str]:
+    """"4+" (or "4 ", an unencoded "+") -> "4-"."""
+    if label is None:
+        return None
+    label = label.strip()
+    if label.endswith("+"):
+        label = label[:-1].strip()
+    if label and label[-1].isdigit() and "-" not in label:
+        label += "-"
+    return label
+
+
+def parse_filters(brand: Optional[str] = None, price: Optional[str] = None,
+                  is_veg: Optional[bool] = None, rating: Optional[str] = None) -> Dict[str, object]:
+    """The facet filters that were given. Raises ValueError on an unknown bucket label."""
+    price = _open_ended(price)
+    if rating is not None and rating.strip() != UNRATED:
+        rating = _open_ended(rating)
+    elif rating is not None:
+        rating = UNRATED
+    if price is not None and price not in PRICE_LABELS:
+        raise ValueError(f"price must be one of {', '.join(PRICE_LABELS)}")
+    if rating is not None and rating not in RATING_LABELS and rating != UNRATED:
+        raise ValueError(f"rating must be one of {', '.join(RATING_LABELS)}, {UNRATED}")
+    given = {"brand": brand, "price": price, "is_veg": is_veg, "rating": rating}
+    return {name: value for name, value in given.items() if value is not None}
+
+
+def _conditions(filters: Dict[str, object]) -> dict:
+    """One SQL condition per filter, in FACETS order."""
+    conditions = {}
+    for name in ("category", "sub_category", "brand", "is_veg"):
+        if name in filters:
+            conditions[name] = getattr(models.Product, name) == filters[name]
+    if "price" in filters:
+        conditions["price"] = and_(*_between(_PRICE, *PRICE_LABELS[filters["price"]]))
+    if "rating" in filters:
+        if filters["rating"] == UNRATED:
+            conditions["rating"] = models.Product.rating.is_(None)
+        else:
+            conditions["rating"] = and_(*_between(models.Product.rating, *RATING_LABELS[filters["rating"]]))
+    return {name: conditions[name] for name in FACETS if name in conditions}
+
+
+def apply_filters(query: Query, filters: Dict[str, object]) -> Query:
+    """`query` narrowed by filters from `parse_filters`."""
+    conditions = _conditions(filters)
+    return query.filter(*conditions.values()) if conditions else query
+
+
+def count(db: Session, scoped: Query, filters: Optional[Dict[str, object]] = None) -> dict:
+    """{"total": n, "facets": {facet: [{"value", "count"}]}} for `scoped`, an unordered
+    query selecting `columns(filters)` and not yet narrowed by `filters`. The total counts
+    rows matching every filter, each facet rows matching all but its own. Categories and
+    brands are listed most common first; price buckets and rating bands in their fixed
+    order."""
+    rows_cte = scoped.cte("facet_rows")
+    active = [name for name in FACETS if name in (filters or {})]
+
+    def matching(*names):
+        return [rows_cte.c[f"match_{name}"] == 1 for name in names]
+
+    queries = [
+        select(literal("total").label("facet"), cast(null(), String).label("value"), func.count().label("n"))
+        .select_from(rows_cte).where(*matching(*active))
+    ]
+    queries += [
+        select(literal(name).label("facet"), cast(rows_cte.c[name], String).label("value"), func.count().label("n"))
+        .where(*matching(*(other for other in active if other != name)))
+        .group_by(rows_cte.c[name])
+        for name in FACETS
+    ]
+    counts: Dict[str, Dict[object, int]] = {name: {} for name in FACETS}
+    total = 0
+    for name, value, n in db.execute(union_all(*queries)):
+        if name == "total":
+            total = n
+            continue
+        if value is None:
+            continue
+        if name == "is_veg":
+            value = value.lower() in ("1", "true")
+        counts[name][value] = counts[name].get(value, 0) + n
+
+    order = {
+        "price": list(PRICE_LABELS),
+        "rating": list(RATING_LABELS) + [UNRATED],
+        "is_veg": [True, False],
+    }
+    facets: Dict[str, List[dict]] = {}
+    for name, values in counts.items():
+        if name in order:
+            ranked = [v for v in order[name] if v in values]
+        else:
+            ranked = sorted(values, key=lambda v: (-values[v], v))
+        facets[name] = [{"value": v, "count": values[v]} for v in ranked]
+    return {"total": total, "facets": facets}
@@ -0,0 +1,165 @@
+"""
+Cache for LLM intent parses.
+
+Popular questions ("show me milk", "checkout") arrive all day with the same wording, and
+each one used to cost a full LLM round trip. `IntentCache` stores the parsed
+`BotResponse` keyed on the normalized message plus the catalog version (the prompt
+embeds catalog context, so a catalog change must invalidate old parses).
+
+Two tiers:
+- an in-memory LRU with TTL, bounded by `max_entries`
+- an optional SQLite file (`INTENT_CACHE_PATH`) that survives restarts and is shared by
+  every worker on the host
+
+Configuration (environment variables):
+- `INTENT_CACHE_SIZE` (default 2048), `INTENT_CACHE_TTL_SECONDS` (default 21600)
+- `INTENT_CACHE_PATH` (optional): path of the SQLite file for the persistent tier
+"""
+
+from typing import Optional, Tuple
+from collections import OrderedDict
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from llm_schemas import BotResponse
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different
+    spellings of the same question share a cache entry."""
+    text = (message or "").lower().strip()
+    text = re.sub(r"[^\w\s₹.]", " ", text)
+    text = re.sub(r"\.(?!\d)", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class IntentCache:
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 21600, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path:
+            self._init_disk()
+
+    @classmethod
+    def from_env(cls) -> "IntentCache":
+        return cls(
+            max_entries=int(os.getenv("INTENT_CACHE_SIZE", "2048")),
+            ttl_seconds=float(os.getenv("INTENT_CACHE_TTL_SECONDS", "21600")),
+            db_path=os.getenv("INTENT_CACHE_PATH") or None,
+        )
+
+    # ----- persistent tier -----
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=1.0)
+
+    def _init_disk(self):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS intent_cache ("
+                    "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute("DELETE FROM intent_cache WHERE expires_at < ?", (time.time(),))
+        except Exception as e:
+            print(f"Intent cache disk tier disabled: {e}")
+            self.db_path = None
+
+    def _disk_get(self, key: str) -> Optional[Tuple[dict, float]]:
+        """(payload, expires_at) of a live entry, else None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM intent_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Intent cache disk read failed: {e}")
+            return None
+        if not row or row[1] < time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _disk_set(self, key: str, payload: dict, expires_at: float):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO intent_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(payload), expires_at),
+                )
+        except Exception as e:
+            print(f"Intent cache disk write failed: {e}")
+
+    # ----- public API -----
+    def make_key(self, message: str, catalog_version: int = 0) -> str:
+        return f"{catalog_version}:{normalize_message(message)}"
+
+    def _put_memory(self, key: str, payload: dict, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, message: str, catalog_version: int = 0) -> Optional[BotResponse]:
+        key = self.make_key(message, catalog_version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return BotResponse(**entry[1])
+                del self._entries[key]
+
+        if self.db_path:
+            stored = self._disk_get(key)
+            if stored is not None:
+                payload, expires_at = stored
+                # Keep the stored expiry: a disk hit must not extend the entry's life
+                self._put_memory(key, payload, expires_at)
+                with self._lock:
+                    self.disk_hits += 1
+                return BotResponse(**payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, message: str, catalog_version: int, resp: BotResponse):
+        if resp is None:
+            return
+        key = self.make_key(message, catalog_version)
+        payload = resp.model_dump(mode="json")
+        expires_at = time.time() + self.ttl_seconds
+        self._put_memory(key, payload, expires_at)
+        if self.db_path:
+            self._disk_set(key, payload, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "persistent": bool(self.db_path),
+        }
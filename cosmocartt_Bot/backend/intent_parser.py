@@ -0,0 +1,395 @@
+"""
+Rule-based intent parser.
+
+Most chat traffic is short, formulaic phrasing ("add 2 amul butter", "price of tomato",
+"rice under 200"). This module parses those locally with a small regex grammar and
+returns a `BotResponse` directly, so they never pay for a Groq round trip. Anything the
+grammar is not confident about returns None and the caller falls back to the LLM.
+
+Hit/miss counters are kept on the parser instance so the API can report how many LLM
+calls the fast path saves.
+"""
+
+from typing import Container, Optional, List, Iterable, Sequence, Tuple
+import re
+import threading
+
+from llm_schemas import BotResponse, QueryType, CartItemIntent
+from utils import CONJUNCTION_PAIR_RE
+
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "dozen": 12, "a dozen": 12, "half dozen": 6, "half a dozen": 6,
+}
+
+# Words that make a message too open-ended (or too context-dependent) for the rules.
+AMBIGUOUS_WORDS = {
+    "and", "or", "not", "without", "except", "instead", "those", "these", "that", "them",
+    "it", "same", "cheaper", "something", "anything", "suggest", "recommend", "best",
+    "for", "with", "if", "which", "compare", "remove", "delete", "this", "is", "to",
+    "cart", "basket", "my", "me", "you",
+}
+
+FILLER_PATTERNS = [
+    r"^(?:hi|hey|hello),?\s+",
+    r"^(?:please|pls|plz|kindly),?\s+",
+    r"^(?:can|could|would|will)\s+you\s+(?:please\s+)?",
+    r"^i\s+(?:want|would\s+like|wanna|need)\s+to\s+",
+    r"^i'?d\s+like\s+to\s+",
+    r",?\s+(?:please|pls|plz)$",
+]
+
+QTY = r"(?P<qty>\d+|a\s+dozen|half\s+a\s+dozen|half\s+dozen|dozen|an?|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)"
+WEIGHT = r"(?P<weight>\d+(?:\.\d+)?\s*(?:kg|kgs|g|gm|gms|grams?|l|ltr|litres?|liters?|ml))"
+CURRENCY = r"(?:₹|rs\.?|inr|rupees)?\s*"
+PRICE = r"(\d+(?:\.\d+)?)\s*(?:₹|rs\.?|rupees)?"
+
+CHECKOUT_RE = re.compile(
+    r"^(?:checkout|check\s+out|place\s+(?:my\s+|the\s+)?order|buy\s+now|pay\s+now|"
+    r"proceed\s+to\s+(?:checkout|payment|pay)|go\s+to\s+checkout)$"
+)
+CART_ADD_RE = re.compile(
+    r"^(?:add|put|get\s+me|buy)\s+"
+    r"(?:" + WEIGHT + r"\s+(?:of\s+)?|" + QTY + r"\s*(?:x\s+|packs?\s+of\s+|units?\s+of\s+|pieces?\s+of\s+)?)?"
+    r"(?P<product>.+?)"
+    r"(?:\s+(?:to|in|into)\s+(?:my\s+|the\s+)?(?:cart|basket|bag))?$"
+)
+PRICE_QUERY_RES = [
+    re.compile(r"^(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:price|cost|rate|mrp)\s+(?:of|for)\s+(?:a\s+|an\s+|the\s+)?(?P<product>.+?)(?:\s+today)?$"),
+    re.compile(r"^how\s+much\s+(?:is|are|does|do|for)\s+(?:a\s+|an\s+|the\s+)?(?P<product>.+?)(?:\s+cost)?$"),
+    re.compile(r"^(?P<product>.+?)\s+(?:price|cost|rate|mrp)$"),
+]
+PRICE_BETWEEN_RE = re.compile(
+    r"^(?:(?:show|list|find)\s+(?:me\s+)?)?(?P<product>.*?)\s*(?:between|from)\s+" + CURRENCY + PRICE +
+    r"\s+(?:and|to|-)\s+" + CURRENCY + PRICE + r"$"
+)
+PRICE_BOUND_RE = re.compile(
+    r"^(?:(?:show|list|find)\s+(?:me\s+)?)?(?P<product>.*?)\s*"
+    r"(?P<op>under|below|less\s+than|within|up\s*to|cheaper\s+than|above|over|more\s+than|greater\s+than|costlier\s+than)\s+"
+    + CURRENCY + PRICE + r"$"
+)
+BROWSE_RE = re.compile(
+    r"^(?:show|list|browse|find|search|display|see)(?:\s+for)?(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+(?P<term>.+?)$"
+    r"|^do\s+you\s+have\s+(?:any\s+)?(?P<term2>.+?)$"
+    r"|^what\s+(?P<term3>.+?)\s+do\s+you\s+have$"
+)
+MULTI_ADD_RE = re.compile(r"^(?P<verb>add|put|get\s+me|buy)\s+(?P<rest>.+)$")
+ITEM_SPLIT_RE = re.compile(r"\s*,\s*(?:and\s+|&\s+)?|\s+(?:and|&)\s+")
+BY_BRAND_RE = re.compile(r"^(?P<product>.+?)\s+(?:by|from)\s+(?P<brand>[a-z0-9&'. ]+)$")
+
+# Follow-ups that only make sense against the previous reply (see session_store.py)
+ORDINALS = {
+    "first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+    "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "last": -1, "cheapest": "cheapest",
+}
+FOLLOWUP_ADD_RE = re.compile(
+    r"^(?:add|put|get\s+me|buy|i'?ll\s+take|take)\s+(?:" + QTY + r"\s+)?(?:of\s+)?"
+    r"(?:those|these|them|it|that|this|that\s+one|this\s+one|the\s+same"
+    r"|(?:the\s+)?(?P<ordinal>" + "|".join(ORDINALS) + r")(?:\s+one)?)"
+    r"(?:\s+(?:to|in|into)\s+(?:my\s+|the\s+)?(?:cart|basket|bag))?$"
+)
+PRICE_FOLLOWUP_RE = re.compile(
+    r"^(?:show\s+(?:me\s+)?|any(?:thing)?\s+|something\s+|are\s+there\s+(?:any\s+)?|got\s+(?:any(?:thing)?\s+)?)?"
+    r"(?P<dir>cheaper|less\s+expensive|lower\s+priced|budget|costlier|more\s+expensive|premium|pricier)"
+    r"(?:\s+(?:ones?|options?|alternatives?|variants?|brands?))?$"
+)
+CHEAPER_WORDS = {"cheaper", "less expensive", "lower priced", "budget"}
+
+GENERIC_TERMS = {"products", "items", "things", "stuff", "all", "everything", "product", "item"}
+# A product name made only of these ("a", "the first one") is not a product
+NON_PRODUCT_WORDS = {"a", "an", "the", "some", "of", "one", "ones", "any", "more", "another", "other"} | set(ORDINALS)
+LOWER_OPS = {"above", "over", "more than", "greater than", "costlier than"}
+
+
+def _known_pair(pair: str, compounds: Sequence[Container[str]]) -> bool:
+    return any(pair in c for c in compounds)
+
+
+def _normalize(message: str) -> str:
+    text = (message or "").strip().lower()
+    text = re.sub(r"[!?;:\"]+", " ", text)
+    text = re.sub(r"\s*,\s*", ", ", text)
+    text = re.sub(r"\.(?!\d)", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    changed = True
+    while changed:
+        changed = False
+        for pat in FILLER_PATTERNS:
+            new = re.sub(pat, "", text)
+            if new != text:
+                text, changed = new.strip(), True
+    return text
+
+
+def _singularize(phrase: str) -> str:
+    """Strip a plural suffix from the last word ("tomatoes" -> "tomato")."""
+    words = phrase.split()
+    if not words:
+        return phrase
+    last = words[-1]
+    if len(last) > 4 and last.endswith("oes"):
+        last = last[:-2]
+    elif len(last) > 4 and last.endswith("ies"):
+        last = last[:-3] + "y"
+    elif len(last) > 3 and last.endswith("s") and not last.endswith("ss"):
+        last = last[:-1]
+    words[-1] = last
+    return " ".join(words)
+
+
+class RuleBasedIntentParser:
+    """Deterministic fast path in front of `ChatbotLLMService.parse_with_context`."""
+
+    def __init__(self, confidence: float = 0.9, max_product_words: int = 5):
+        self.confidence = confidence
+        self.max_product_words = max_product_words
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # ----- stats -----
+    def _record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "llm_calls_saved": self.hits,
+        }
+
+    # ----- helpers -----
+    def _clean_product(self, phrase: Optional[str], compounds: Sequence[Container[str]] = ()) -> Optional[str]:
+        if not phrase:
+            return None
+        phrase = re.sub(r"^(?:some|the|a|an|of)\s+", "", phrase.strip())
+        if not phrase or phrase in GENERIC_TERMS:
+            return None
+        words = phrase.split()
+        if len(words) > self.max_product_words:
+            return None
+        if all(w in NON_PRODUCT_WORDS or len(w) < 2 for w in words):
+            return None
+        # A conjunction is fine inside a known product name ("mac and cheese")
+        joined = {"and", "&"} if self._only_known_pairs(phrase, compounds) else set()
+        if any(w in AMBIGUOUS_WORDS and w not in joined for w in words):
+            return None
+        if not re.search(r"[a-z]", phrase) or phrase[0].isdigit():
+            return None
+        return _singularize(phrase)
+
+    @staticmethod
+    def _only_known_pairs(phrase: str, compounds: Sequence[Container[str]]) -> bool:
+        pairs = [f"{m.group(1)} and {m.group(2)}" for m in CONJUNCTION_PAIR_RE.finditer(phrase)]
+        return bool(pairs) and all(_known_pair(p, compounds) for p in pairs)
+
+    @staticmethod
+    def _known_words(product: str, vocabulary: Sequence[Container[str]]) -> bool:
+        """Whether some word of `product` is a catalog (or alias) word."""
+        return any(form in v for word in product.split() for form in (word, _singularize(word)) for v in vocabulary)
+
+    def _split_items(self, rest: str, compounds: Sequence[Container[str]]) -> List[str]:
+        """Split a multi-item list on commas and on "and"/"&", except inside a known name."""
+        parts, start = [], 0
+        for m in ITEM_SPLIT_RE.finditer(rest):
+            if "," not in m.group(0):
+                before = rest[:m.start()].split()
+                after = rest[m.end():].split()
+                if before and after and _known_pair(f"{before[-1]} and {after[0]}", compounds):
+                    continue
+            parts.append(rest[start:m.start()])
+            start = m.end()
+        parts.append(rest[start:])
+        return [p for p in parts if p and p.strip()]
+
+    def _split_brand(self, phrase: str, brands: Iterable[str]) -> Tuple[str, Optional[str]]:
+        """Split "amul butter" / "butter by amul" into (product, brand) when the brand is known
+        or explicitly introduced with "by"/"from"."""
+        m = BY_BRAND_RE.match(phrase)
+        if m:
+            return m.group("product"), m.group("brand").strip()
+        for b in sorted((b for b in brands if b), key=len, reverse=True):
+            b_low = b.lower()
+            if phrase.startswith(b_low + " ") and len(phrase) > len(b_low) + 1:
+                return phrase[len(b_low) + 1:], b
+        return phrase, None
+
+    def _match_category(self, term: str, categories: Iterable[str]) -> Optional[str]:
+        term = term.strip()
+        for c in categories:
+            if not c:
+                continue
+            c_low = c.lower()
+            if term == c_low or _singularize(c_low) == _singularize(term):
+                return c
+        for c in categories:
+            if c and term in re.split(r"\s*(?:&|,|and)\s*", c.lower()):
+                return c
+        return None
+
+    def _response(self, query_type: QueryType, action: str, **fields) -> BotResponse:
+        return BotResponse(query_type=query_type, action=action, confidence=self.confidence, **fields)
+
+    # ----- grammar -----
+    def _parse(self, text: str, categories: List[str], brands: List[str],
+               compounds: Sequence[Container[str]] = (),
+               vocabulary: Sequence[Container[str]] = ()) -> Optional[BotResponse]:
+        if not text:
+            return None
+
+        if "," in text or " and " in text or " & " in text:
+            multi = self._multi_cart_add(text, brands, compounds)
+            if multi is not None:
+                return multi
+            if "," in text:
+                return None
+
+        if CHECKOUT_RE.match(text):
+            return self._response(QueryType.CHECKOUT, "initiate_checkout")
+
+        m = PRICE_BETWEEN_RE.match(text)
+        if m:
+            low, high = sorted((float(m.group(2)), float(m.group(3))))
+            phrase = m.group("product").strip()
+            product = self._clean_product(phrase, compounds) if phrase else None
+            if phrase and product is None and phrase not in GENERIC_TERMS:
+                return None
+            return self._price_filter(product, categories, min_price=low, max_price=high)
+
+        m = PRICE_BOUND_RE.match(text)
+        if m:
+            value = float(m.group(3))
+            op = re.sub(r"\s+", " ", m.group("op"))
+            phrase = m.group("product").strip()
+            product = self._clean_product(phrase, compounds) if phrase else None
+            if phrase and product is None and phrase not in GENERIC_TERMS:
+                return None
+            if op in LOWER_OPS:
+                return self._price_filter(product, categories, min_price=value)
+            return self._price_filter(product, categories, max_price=value)
+
+        m = CART_ADD_RE.match(text)
+        if m:
+            return self._cart_add(m, brands, compounds)
+
+        for rx in PRICE_QUERY_RES:
+            m = rx.match(text)
+            if m:
+                phrase, brand = self._split_brand(m.group("product").strip(), brands)
+                product = self._clean_product(phrase, compounds)
+                if not product:
+                    return None
+                return self._response(QueryType.PRICE_QUERY, "check_price", product_name=product, brand=brand)
+
+        m = BROWSE_RE.match(text)
+        if m:
+            term = (m.group("term") or m.group("term2") or m.group("term3") or "").strip()
+            term = re.sub(r"\s+(?:products|items|section)$", "", term)
+            category = self._match_category(term, categories)
+            if category:
+                return self._response(QueryType.CATEGORY_FILTER, "filter_category", category=category, limit=5)
+            phrase, brand = self._split_brand(term, brands)
+            product = self._clean_product(phrase, compounds)
+            if not product:
+                return None
+            # "show me the money", "find out more": a browse verb alone is weak evidence
+            if vocabulary and not brand and not self._known_words(product, vocabulary):
+                return None
+            return self._response(QueryType.PRODUCT_SEARCH, "search_product", product_name=product, brand=brand)
+
+        return None
+
+    def _cart_add(self, m: "re.Match", brands: List[str], compounds: Sequence[Container[str]] = ()) -> Optional[BotResponse]:
+        phrase, brand = self._split_brand(m.group("product").strip(), brands)
+        product = self._clean_product(phrase, compounds)
+        if not product:
+            return None
+        weight = m.group("weight")
+        qty_word = m.group("qty")
+        if qty_word is None:
+            quantity = 1
+        elif qty_word.isdigit():
+            quantity = int(qty_word)
+        else:
+            quantity = NUMBER_WORDS.get(re.sub(r"\s+", " ", qty_word))
+        if not quantity or quantity < 1 or quantity > 99:
+            return None
+        return self._response(
+            QueryType.CART_ADD, "add_to_cart",
+            product_name=product, brand=brand, quantity=quantity,
+            weight=weight.replace(" ", "") if weight else None,
+        )
+
+    def _multi_cart_add(self, text: str, brands: List[str], compounds: Sequence[Container[str]] = ()) -> Optional[BotResponse]:
+        """"add 2 milk, 1 bread and a dozen eggs" -> one CART_ADD carrying three items.
+        Every part must parse on its own, otherwise the whole message goes to the LLM."""
+        m = MULTI_ADD_RE.match(text)
+        if not m:
+            return None
+        parts = self._split_items(m.group("rest"), compounds)
+        if len(parts) < 2:
+            return None
+        items = []
+        for part in parts:
+            single = CART_ADD_RE.match(f"{m.group('verb')} {part.strip()}")
+            resp = self._cart_add(single, brands, compounds) if single else None
+            if resp is None:
+                return None
+            items.append(CartItemIntent(product_name=resp.product_name, brand=resp.brand,
+                                        quantity=resp.quantity, weight=resp.weight))
+        return self._response(QueryType.CART_ADD, "add_to_cart", items=items)
+
+    def _price_filter(self, product: Optional[str], categories: List[str],
+                      min_price: Optional[float] = None, max_price: Optional[float] = None) -> BotResponse:
+        category = self._match_category(product, categories) if product else None
+        return self._response(
+            QueryType.PRICE_FILTER, "filter_by_price",
+            product_name=None if category else product, category=category,
+            min_price=min_price, max_price=max_price,
+        )
+
+    def parse_followup(self, user_message: str) -> Optional[dict]:
+        """Recognise replies to the previous turn: {"kind": "add", "quantity", "pick"} for
+        "add two of those" / "add the second one", {"kind": "cheaper" | "pricier"} for
+        "cheaper ones?". Returns None for anything else."""
+        text = _normalize(user_message)
+        m = FOLLOWUP_ADD_RE.match(text)
+        if m:
+            qty_word = m.group("qty")
+            if qty_word is None:
+                quantity = 1
+            elif qty_word.isdigit():
+                quantity = int(qty_word)
+            else:
+                quantity = NUMBER_WORDS.get(re.sub(r"\s+", " ", qty_word))
+            if not quantity or quantity > 99:
+                return None
+            ordinal = m.group("ordinal")
+            return {"kind": "add", "quantity": quantity, "pick": ORDINALS[ordinal] if ordinal else None}
+        m = PRICE_FOLLOWUP_RE.match(text)
+        if m:
+            direction = re.sub(r"\s+", " ", m.group("dir"))
+            return {"kind": "cheaper" if direction in CHEAPER_WORDS else "pricier"}
+        return None
+
+    def parse(self, user_message: str, categories: Optional[List[str]] = None,
+              brands: Optional[List[str]] = None, compounds: Sequence[Container[str]] = (),
+              vocabulary: Sequence[Container[str]] = ()) -> Optional[BotResponse]:
+        """Return a `BotResponse` for messages the grammar fully understands, else None.
+        `compounds` holds sets of `utils.conjunction_pairs` (catalog names, aliases); `vocabulary`
+        sets of catalog words, which a browse request must use ("show me the money" doesn't)."""
+        try:
+            resp = self._parse(_normalize(user_message), categories or [], brands or [], compounds, vocabulary)
+        except Exception as e:
+            print(f"Rule-based intent parse failed: {e}")
+            resp = None
+        self._record(resp is not None)
+        return resp
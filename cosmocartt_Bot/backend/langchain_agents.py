@@ -1,30 +1,94 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+import asyncio
+import threading
 try:
     from langchain import LLMChain  # optional, only used if available
 except Exception:
     LLMChain = None
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, or_, case, select, literal, union_all
 from utils import similarity
+from llm_service import LLMUnavailableError
+from llm_schemas import BotResponse, QueryType
+from prefetch import PREFETCH_GRACE_SECONDS, candidate_nouns, prefetch_stats
 import models
+import projection
+import re
+
+# Words that never identify a product; dropped when searching the raw message
+SEARCH_STOPWORDS = {
+    "the", "and", "for", "you", "your", "have", "any", "some", "show", "want", "need", "please",
+    "add", "cart", "price", "what", "how", "much", "give", "get", "can", "with", "from",
+    "buy", "find", "are", "all", "products", "items", "cost", "got", "today", "looking", "like",
+}
+
+# Columns `_row_to_dict` ships; dates, stock and the rest are never read for chat rows
+ROW_COLUMNS = load_only(
+    models.Product.index, models.Product.product, models.Product.sale_price, models.Product.market_price,
+    models.Product.category, models.Product.image_url, models.Product.description, models.Product.brand,
+    models.Product.rating, models.Product.is_veg, models.Product.unit_type, models.Product.weight_str,
+)
 
 
 class SimpleShoppingAgent:
     """A lightweight DB-aware agent helper to orchestrate LLM parsing + product lookup.
 
     Accepts a SQLAlchemy `db` session to return full product rows in responses.
+    An optional `intent_parser` (see `intent_parser.RuleBasedIntentParser`) is tried
+    before the LLM so simple messages are answered without a Groq round trip.
     """
-    def __init__(self, llm_service, db: Session, categories: List[str], products: List[str]):
+    def __init__(self, llm_service, db: Session, categories: List[str], products: List[str],
+                 intent_parser=None, brands: Optional[List[str]] = None, catalog_version: int = 0,
+                 deadline=None, respond_flight=None, session_store=None, user_id: Optional[str] = None,
+                 vocabulary=None, product_index=None, similarity_index=None, aliases=None,
+                 semantic_index=None, catalog_cache=None, compounds=frozenset()):
         self.llm_service = llm_service
         self.db = db
         self.categories = categories or []
         self.products = products or []
+        self.brands = brands or []
+        self.intent_parser = intent_parser
+        self.catalog_version = catalog_version
+        self.deadline = deadline
+        # Optional `singleflight.AsyncSingleFlight` shared across requests: identical
+        # concurrent intents run the DB resolution once
+        self.respond_flight = respond_flight
+        # Optional `session_store.SessionStore`: remembers each user's last reply so
+        # follow-ups ("add two of those", "cheaper ones?") resolve without the LLM
+        self.session_store = session_store
+        self.user_id = user_id
+        # Set while streaming: called with every serialized product row
+        self._on_row = None
+        # Catalog words (see `prefetch.build_vocabulary`); enables speculative prefetch
+        # of product lookups while the LLM parses the message
+        self.vocabulary = vocabulary
+        self._prefetched_best: Dict[str, List[Tuple[models.Product, int]]] = {}
+        self._prefetched_search: Dict[str, List[models.Product]] = {}
+        self._prefetch_used = False
+        # Bumped by every settle: a prefetch thread from an earlier generation arrived too
+        # late and must not publish its rows
+        self._prefetch_generation = 0
+        self._prefetch_lock = threading.Lock()
+        # Optional `trigram_index.TrigramIndex` over the whole catalog; without it names
+        # are only matched against the `products` sample
+        self.product_index = product_index
+        # Optional `tfidf_index.TfidfIndex`: vectorized scoring of candidate rows
+        self.similarity_index = similarity_index
+        # Optional `synonyms.AliasMatcher`: rewrites "dahi" -> curd, "sabzi" -> Fruits & Vegetables
+        self.aliases = aliases
+        # Optional `semantic_index.SemanticIndex`: consulted when lexical matching finds nothing
+        self.semantic_index = semantic_index
+        # Optional `catalog_cache.CatalogCache`: product rows by id and search listings,
+        # shared with the catalog endpoints and keyed on `catalog_version`
+        self.catalog_cache = catalog_cache
+        # `utils.conjunction_pairs` of the catalog's product names
+        self.compounds = compounds
 
     def _row_to_dict(self, p: models.Product) -> Dict[str, Any]:
         if not p:
             return {}
-        return {
+        row = {
             "id": p.index,
             "name": p.product,
             "sale_price": p.sale_price,
@@ -38,72 +102,578 @@ class SimpleShoppingAgent:
             "unit_type": p.unit_type,
             "weight_str": p.weight_str,
         }
+        if self._on_row is not None:
+            self._on_row(row)
+        return row
 
     def _fetch_product_by_name(self, name: str, brand: Optional[str] = None) -> Optional[models.Product]:
-        """Try several matching strategies in order:
+        """Resolve a name to one row with a single ranked query. Preference order:
         1. Exact (case-insensitive) equality
-        2. Startswith / token match (brand filtered if provided)
-        3. Fallback: pick best fuzzy match among partial results
-        Returns first matching row or None.
+        2. Startswith (brand filtered if provided)
+        3. Best fuzzy match among the top substring candidates
+        Returns the best row or None.
         """
         if not name:
             return None
         name_clean = name.strip().lower()
 
-        # 1) exact match
-        q_exact = self.db.query(models.Product).filter(func.lower(models.Product.product) == name_clean)
-        if brand:
-            q_exact = q_exact.filter(func.lower(models.Product.brand) == (brand.strip().lower()))
-        exact = q_exact.first()
-        if exact:
-            return exact
+        if not brand and name_clean in self._prefetched_best:
+            self._prefetch_used = True
+            return self._pick_best(name_clean, self._prefetched_best[name_clean])
+
+        # lower(product) LIKE '%name%' is served by the pg_trgm GIN index (see models.Product)
+        return self._pick_best(name_clean, self._ranked_candidates([(name_clean, brand)]).get(0, []))
+
+    def _name_terms(self, name: str) -> List[str]:
+        """Lowercased `name` plus its canonical alias form ("yogurt" also searches "curd"),
+        the same OR expansion `/products` searches use."""
+        name = name.strip().lower()
+        canonical = self.aliases.normalize(name, kinds=("product",)) if self.aliases is not None else name
+        return [name] if canonical == name else [name, canonical]
+
+    def _match_rank(self, terms: List[str]):
+        """SQL rank of a row against lowercased name terms: 0 exact, 1 prefix, 2 substring."""
+        lower_name = func.lower(models.Product.product)
+        return case(
+            (lower_name.in_(terms), 0),
+            (or_(*[lower_name.like(f"{t}%") for t in terms]), 1),
+            else_=2,
+        )
+
+    def _pick_best(self, name_clean: str, ranked: List[Tuple[models.Product, int]]) -> Optional[models.Product]:
+        """Same preference as `_fetch_product_by_name`: exact, then prefix, then the
+        substring candidate most similar to the requested name."""
+        if not ranked:
+            return None
+        best_rank = min(r for _, r in ranked)
+        if best_rank < 2:
+            return next(p for p, r in ranked if r == best_rank)
+        candidates = [p for p, _ in ranked]
+        if self.similarity_index is not None:
+            scores = self.similarity_index.score_ids(name_clean, [p.index for p in candidates])
+            if None not in scores:
+                return candidates[max(range(len(candidates)), key=scores.__getitem__)]
+        return max(candidates, key=lambda p: similarity(name_clean, p.product or ""))
+
+    def _ranked_candidates(self, wanted: List[Tuple[str, Optional[str]]], per_name: int = 10,
+                           db: Optional[Session] = None) -> Dict[int, List[Tuple[models.Product, int]]]:
+        """Candidate rows for many (name, brand) pairs in one round trip, keyed by pair index.
+
+        Builds a UNION ALL of per-name candidate selects (each ranked and limited on its own
+        so one common name can't crowd out the others) and joins it back to the product rows.
+        """
+        selects = []
+        for slot, (name, brand) in enumerate(wanted):
+            name_clean = (name or "").strip().lower()
+            if not name_clean:
+                continue
+            terms = self._name_terms(name_clean)
+            rank = self._match_rank(terms)
+            # rows whose brand matches exactly beat brand substrings; shorter names beat longer
+            brand_rank = (case((func.lower(models.Product.brand) == brand.strip().lower(), 0), else_=1)
+                          if brand else literal(0))
+            name_len = func.length(models.Product.product)
+            stmt = select(
+                models.Product.index.label("pid"), literal(slot).label("slot"), rank.label("match_rank"),
+                brand_rank.label("brand_rank"), name_len.label("name_len"),
+            ).where(or_(*[func.lower(models.Product.product).like(f"%{t}%") for t in terms]))
+            if brand:
+                stmt = stmt.where(models.Product.brand.ilike(f"%{brand.strip()}%"))
+            stmt = stmt.order_by(rank, brand_rank, name_len).limit(per_name)
+            selects.append(select(stmt.subquery()))
+
+        by_slot: Dict[int, List[Tuple[models.Product, int]]] = {}
+        if not selects:
+            return by_slot
+        candidates = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+        rows = (
+            (db or self.db).query(models.Product, candidates.c.slot, candidates.c.match_rank).options(ROW_COLUMNS)
+            .join(candidates, candidates.c.pid == models.Product.index)
+            .order_by(candidates.c.slot, candidates.c.match_rank, candidates.c.brand_rank, candidates.c.name_len)
+            .all()
+        )
+        for prod, slot, rank in rows:
+            by_slot.setdefault(slot, []).append((prod, rank))
+        return by_slot
+
+    def _fetch_best_products(self, wanted: List[Tuple[str, Optional[str]]], per_name: int = 10) -> List[Optional[models.Product]]:
+        """Resolve many (name, brand) pairs in one round trip; picks the best row per name
+        in memory. Returns one entry (or None) per pair."""
+        results: List[Optional[models.Product]] = [None] * len(wanted)
+        for slot, ranked in self._ranked_candidates(wanted, per_name).items():
+            results[slot] = self._pick_best((wanted[slot][0] or "").strip().lower(), ranked)
+        return results
 
-        # 2) startswith / token match
-        q_token = self.db.query(models.Product).filter(models.Product.product.ilike(f"{name_clean}%"))
-        if brand:
-            q_token = q_token.filter(models.Product.brand.ilike(f"%{brand}%"))
-        token_first = q_token.first()
-        if token_first:
-            return token_first
+    def _respond_cart_items(self, resp) -> Dict[str, Any]:
+        """CART_ADD for several products at once, resolved with a single batched query."""
+        items = resp.items
+        prods = self._fetch_best_products([(it.product_name, it.brand) for it in items])
+        added, missing = [], []
+        for it, prod in zip(items, prods):
+            if prod:
+                added.append({"product": self._row_to_dict(prod), "quantity": it.quantity, "weight": it.weight})
+            else:
+                missing.append(it.product_name)
+
+        message = ""
+        if added:
+            parts = [f"{a['quantity']} x {a['product']['name']}" for a in added]
+            listed = parts[0] if len(parts) == 1 else ", ".join(parts[:-1]) + f" and {parts[-1]}"
+            message = f"Adding {listed} to cart"
+        if missing:
+            message = (message + ". " if message else "") + f"Couldn't find: {', '.join(missing)}"
+        return {
+            "success": bool(added),
+            "query_type": "CART_ADD",
+            "action": "add_multiple_to_cart" if added else "not_found",
+            "items": added,
+            "not_found": missing,
+            "message": message,
+            "confidence": resp.confidence,
+        }
 
-        # 3) partial matches: gather candidates and pick best fuzzy
-        q_partial = self.db.query(models.Product).filter(models.Product.product.ilike(f"%{name_clean}%"))
+    def _fetch_products_by_names(self, names: List[str], limit: int = 5, brand: Optional[str] = None) -> List[models.Product]:
+        """Best row for each of the first `limit` names (same preference order as
+        `_fetch_product_by_name`), resolved together in one batched query."""
+        return [p for p in self._fetch_best_products([(n, brand) for n in names[:limit]]) if p]
+
+    def _parse_intent_locally(self, user_message: str):
+        if self.intent_parser is None:
+            return None
+        if self.aliases is not None:
+            # Brand spellings only: product terms stay as typed and are expanded at lookup
+            user_message = self.aliases.normalize(user_message, kinds=("brand",))
+        compounds = (self.compounds, self.aliases.compounds) if self.aliases is not None else (self.compounds,)
+        vocabulary = (self.vocabulary, self.aliases.words) if self.aliases is not None else (self.vocabulary,)
+        return self.intent_parser.parse(user_message, self.categories, self.brands, compounds,
+                                        tuple(v for v in vocabulary if v))
+
+    def _apply_aliases(self, resp):
+        """Rewrite alias spellings of brands and categories in a parsed intent to the
+        catalog's own terms. Product names are kept: lookups search them together with
+        their canonical form (see `_name_terms`)."""
+        if self.aliases is None:
+            return resp
+        update = {}
+        brand = self.aliases.normalize(resp.brand, kinds=("brand",))
+        if brand != resp.brand:
+            update["brand"] = brand
+        category = self.aliases.canonical_category(resp.category)
+        if category:
+            update["category"] = category
+        if resp.items:
+            update["items"] = [
+                it.model_copy(update={"brand": self.aliases.normalize(it.brand, kinds=("brand",))})
+                for it in resp.items
+            ]
+        return resp.model_copy(update=update) if update else resp
+
+    def _parse_intent(self, user_message: str):
+        """Rule-based fast path first; fall back to the LLM only when the rules aren't confident."""
+        resp = self._parse_intent_locally(user_message)
+        if resp is not None:
+            return resp
+        return self.llm_service.parse_with_context(user_message, self.categories, self.products,
+                                                   catalog_version=self.catalog_version, deadline=self.deadline)
+
+    async def _aparse_intent(self, user_message: str):
+        resp = self._parse_intent_locally(user_message)
+        if resp is not None:
+            return resp
+        prefetch = None
+
+        def start_prefetch():
+            # The LLM round trip leaves the DB idle: warm the likely lookups meanwhile.
+            # Not on intent-cache hits, which answer without waiting at all.
+            nonlocal prefetch
+            nouns = candidate_nouns(user_message, self.vocabulary) if self.vocabulary else []
+            if nouns:
+                prefetch = asyncio.ensure_future(asyncio.to_thread(self._prefetch, nouns, self._prefetch_generation))
+
+        try:
+            return await self.llm_service.aparse_with_context(user_message, self.categories, self.products,
+                                                              catalog_version=self.catalog_version, deadline=self.deadline,
+                                                              on_miss=start_prefetch)
+        finally:
+            if prefetch is not None and not prefetch.done():
+                # Don't hold the turn for it: a short grace period, then it is dropped
+                await asyncio.wait({prefetch}, timeout=PREFETCH_GRACE_SECONDS)
+                if not prefetch.done():
+                    self._settle_prefetch()
+
+    # ----- speculative prefetch -----
+    def _prefetch(self, nouns: List[str], generation: int):
+        """Load best-match candidates for every noun and the search listing for the first
+        one. Runs in a worker thread on its own short-lived session (the request session
+        is not thread-safe and must not hold a connection through the LLM wait). The rows
+        are published only if no settle happened since `generation`."""
+        prefetch_stats.record(started=True)
+        try:
+            with Session(bind=self.db.get_bind(), expire_on_commit=False) as db:
+                ranked = self._ranked_candidates([(n, None) for n in nouns], db=db)
+                listing = self._search_query(nouns[0], None, db=db).all()
+        except Exception as e:
+            print(f"Prefetch failed: {e}")
+            return
+        with self._prefetch_lock:
+            if generation != self._prefetch_generation:
+                prefetch_stats.record(wasted=True)
+                return
+            self._prefetched_best = {n: ranked.get(slot, []) for slot, n in enumerate(nouns)}
+            self._prefetched_search = {nouns[0]: listing}
+
+    def _settle_prefetch(self):
+        """Count whether the speculative rows were used, then drop them (and any prefetch
+        still running)."""
+        with self._prefetch_lock:
+            if self._prefetched_best:
+                prefetch_stats.record(used=self._prefetch_used, wasted=not self._prefetch_used)
+            self._prefetched_best, self._prefetched_search = {}, {}
+            self._prefetch_used = False
+            self._prefetch_generation += 1
+
+    def _search_query(self, name: str, brand: Optional[str], db: Optional[Session] = None):
+        """PRODUCT_SEARCH listing: every brand/variant of `name`, cheapest first."""
+        terms = self._name_terms(name)
+        query = (db or self.db).query(models.Product).options(ROW_COLUMNS) \
+            .filter(or_(*[models.Product.product.ilike(f"%{t}%") for t in terms]))
         if brand:
-            q_partial = q_partial.filter(models.Product.brand.ilike(f"%{brand}%"))
-        candidates = q_partial.limit(10).all()
-        if not candidates:
+            query = query.filter(models.Product.brand.ilike(f"%{brand}%"))
+        return query.order_by(models.Product.sale_price.asc()).limit(20)
+
+    # ----- conversation follow-ups -----
+    def _remember(self, intent: Optional[dict], result: Dict[str, Any]):
+        if self.session_store is not None and self.user_id:
+            self.session_store.remember(self.user_id, intent, result)
+
+    async def _aremember(self, intent: Optional[dict], result: Dict[str, Any]):
+        if self.session_store is not None and self.user_id:
+            await asyncio.to_thread(self.session_store.remember, self.user_id, intent, result)
+
+    async def _aresolve_followup(self, user_message: str) -> Optional[Dict[str, Any]]:
+        if self.session_store is None or not self.user_id:
+            return None
+        return await asyncio.to_thread(self._resolve_followup, user_message)
+
+    def _products_by_ids(self, ids: List[int]) -> List[models.Product]:
+        """Rows for ids from a session's cached result set: a primary-key lookup, kept in order.
+        With a catalog cache, cached rows come back as detached `models.Product` objects."""
+        if not ids:
+            return []
+        if self.catalog_cache is None:
+            by_id = {p.index: p for p in self.db.query(models.Product).options(ROW_COLUMNS).filter(models.Product.index.in_(ids)).all()}
+            return [by_id[i] for i in ids if i in by_id]
+        rows = self.catalog_cache.get_many("product", ids, self.catalog_version)
+        missing = [i for i in ids if i not in rows]
+        if missing:
+            fields = projection.PRODUCT_FIELDS
+            for values in self.db.query(*projection.columns(fields)).filter(models.Product.index.in_(missing)):
+                row = dict(zip(fields, values))
+                rows[row["index"]] = row
+                self.catalog_cache.put("product", row["index"], self.catalog_version, row)
+        return [models.Product(**rows[i]) for i in ids if i in rows]
+
+    def _search_listing(self, name: str, brand: Optional[str]) -> List[models.Product]:
+        """`_search_query` rows; with a catalog cache, the listing's ids are cached per
+        (name, brand) and the rows come from the product cache."""
+        if self.catalog_cache is None:
+            return self._search_query(name, brand).all()
+        key = (name.strip().lower(), (brand or "").strip().lower())
+        ids = self.catalog_cache.get("chat_search", key, self.catalog_version)
+        if ids is not None:
+            return self._products_by_ids(ids)
+        products = self._search_query(name, brand).all()
+        self.catalog_cache.put("chat_search", key, self.catalog_version, [p.index for p in products])
+        return products
+
+    def _resolve_followup(self, user_message: str) -> Optional[Dict[str, Any]]:
+        """Answer a follow-up from the user's cached last reply, or None if it isn't one."""
+        if self.session_store is None or not self.user_id or self.intent_parser is None:
+            return None
+        followup = self.intent_parser.parse_followup(user_message)
+        if followup is None:
+            return None
+        session = self.session_store.get(self.user_id)
+        if not session or not session.get("products"):
             return None
 
-        # choose candidate with highest similarity score
-        best = None
-        best_score = 0.0
-        for c in candidates:
-            s = similarity(name_clean, c.product or "")
-            if s > best_score:
-                best_score = s
-                best = c
-        return best
+        cached = session["products"]  # [[id, name, sale_price], ...] in display order
+        intent = session.get("intent")
+        if followup["kind"] == "add":
+            result = self._followup_add(followup, cached)
+        else:
+            result = self._followup_price(followup["kind"] == "cheaper", cached, intent or {})
+        if result is not None:
+            self._remember(intent, result)
+        return result
+
+    def _followup_add(self, followup: dict, cached: List[list]) -> Optional[Dict[str, Any]]:
+        quantity = followup["quantity"]
+        pick = followup["pick"]
+        if pick == "cheapest":
+            chosen = min(cached, key=lambda c: c[2] if c[2] is not None else float("inf"))
+        elif isinstance(pick, int):
+            if pick >= len(cached) or -pick > len(cached):
+                return {
+                    "success": False, "query_type": "CART_ADD", "action": "not_found",
+                    "message": f"I only showed {len(cached)} product(s) — which one would you like?",
+                    "confidence": 0.9,
+                }
+            chosen = cached[pick]
+        else:
+            chosen = cached[0]
 
-    def _fetch_products_by_names(self, names: List[str], limit: int = 5, brand: Optional[str] = None) -> List[models.Product]:
-        results = []
-        for n in names[:limit]:
-            r = self._fetch_product_by_name(n, brand=brand)
-            if r:
-                results.append(r)
-        return results
+        prods = self._products_by_ids([chosen[0]])
+        if not prods:
+            return None
+        prod = prods[0]
+        if pick is None and len(cached) > 1:
+            # "add two of those" after a list is ambiguous: confirm the top result instead of guessing
+            return {
+                "success": False,
+                "query_type": "CART_ADD",
+                "action": "ask_confirmation",
+                "suggestion": self._row_to_dict(prod),
+                "quantity": quantity,
+                "message": f"Do you mean '{prod.product}'?",
+                "confidence": 0.6,
+            }
+        return {
+            "success": True,
+            "query_type": "CART_ADD",
+            "action": "add_to_cart",
+            "product": self._row_to_dict(prod),
+            "quantity": quantity,
+            "message": f"Adding {quantity} x {prod.product} to cart",
+            "confidence": 0.9,
+        }
+
+    def _followup_price(self, cheaper: bool, cached: List[list], intent: dict) -> Optional[Dict[str, Any]]:
+        priced = [c for c in cached if c[2] is not None]
+        if not priced:
+            return None
+        prices = sorted(c[2] for c in priced)
+        # One product: compare against it. A list: compare against its median price.
+        reference = prices[len(prices) // 2]
+        if cheaper:
+            picked = sorted((c for c in priced if c[2] < reference), key=lambda c: c[2])
+        else:
+            picked = sorted((c for c in priced if c[2] > reference), key=lambda c: -c[2])
+        word = "cheaper" if cheaper else "pricier"
+
+        if picked:
+            prods = self._products_by_ids([c[0] for c in picked])
+            return {
+                "success": True,
+                "query_type": "PRICE_FILTER",
+                "action": "display_products",
+                "products": [self._row_to_dict(p) for p in prods],
+                "message": f"Found {len(prods)} {word} options from your last results",
+                "confidence": 0.9,
+            }
+
+        # Nothing in the cached set: re-run the last search with a price bound
+        if not intent.get("product_name") and not intent.get("category"):
+            return None
+        bound = {"max_price": round(reference - 0.01, 2)} if cheaper else {"min_price": round(reference + 0.01, 2)}
+        return self.respond(BotResponse(
+            query_type=QueryType.PRICE_FILTER, action="filter_by_price",
+            product_name=intent.get("product_name"), category=intent.get("category"),
+            confidence=0.9, **bound,
+        ))
+
+    def _semantic_products(self, text: Optional[str], limit: int = 20) -> List[models.Product]:
+        """Products related to a vague request ("something for breakfast") by meaning rather
+        than by name; empty without a semantic index."""
+        if self.semantic_index is None or not text:
+            return []
+        hits = self.semantic_index.search(text, k=limit)
+        return self._products_by_ids([pid for pid, _ in hits])
+
+    def degraded_search(self, user_message: str) -> Dict[str, Any]:
+        """Plain keyword search over product names, used when the LLM is unavailable
+        (breaker open / deadline spent) so chat latency stays bounded."""
+        text = (user_message or "").lower()
+        if self.aliases is not None:
+            # Search the words as typed and their canonical forms, like `/products`
+            normalized = self.aliases.normalize(text)
+            if normalized != text:
+                text = f"{text} {normalized}"
+        keywords = list(dict.fromkeys(w for w in re.findall(r"[a-z]+", text)
+                                      if len(w) > 2 and w not in SEARCH_STOPWORDS))
+        products = []
+        if keywords:
+            conditions = [models.Product.product.ilike(f"%{k}%") for k in keywords]
+            candidates = self.db.query(models.Product).options(ROW_COLUMNS).filter(or_(*conditions)).limit(50).all()
+            # Rows matching more of the keywords first
+            candidates.sort(key=lambda p: -sum(1 for k in keywords if k in (p.product or "").lower()))
+            products = candidates[:20]
+        if not products:
+            products = self._semantic_products(" ".join(keywords))
+        if products:
+            return {
+                "success": True,
+                "query_type": "PRODUCT_SEARCH",
+                "action": "display_products",
+                "products": [self._row_to_dict(p) for p in products],
+                "message": f"Found {len(products)} products matching '{' '.join(keywords)}'",
+                "confidence": 0.5,
+                "degraded": True,
+            }
+        return {
+            "success": False,
+            "query_type": "UNKNOWN",
+            "action": "not_found",
+            "message": "Our assistant is busy right now — try searching for a product by name.",
+            "confidence": 0.0,
+            "degraded": True,
+        }
 
     def run_query(self, user_message: str) -> Dict[str, Any]:
+        followup = self._resolve_followup(user_message)
+        if followup is not None:
+            return followup
+
         # Parse intent with context
-        resp = self.llm_service.parse_with_context(user_message, self.categories, self.products)
+        try:
+            resp = self._parse_intent(user_message)
+        except LLMUnavailableError as e:
+            print(f"LLM unavailable ({e}); falling back to local search")
+            return self.degraded_search(user_message)
         if not resp:
             return {"success": False, "error": "Could not understand query"}
+        result = self.respond(resp)
+        self._remember(resp.model_dump(mode="json", exclude_none=True), result)
+        return result
+
+    async def arun_query(self, user_message: str) -> Dict[str, Any]:
+        """Async `run_query`: the LLM wait is awaited on the pooled client and the
+        (short, blocking) DB resolution runs in a worker thread."""
+        followup = await self._aresolve_followup(user_message)
+        if followup is not None:
+            return followup
+
+        try:
+            resp = await self._aparse_intent(user_message)
+        except LLMUnavailableError as e:
+            print(f"LLM unavailable ({e}); falling back to local search")
+            return await asyncio.to_thread(self.degraded_search, user_message)
+        if not resp:
+            return {"success": False, "error": "Could not understand query"}
+        result = await self._arespond(resp)
+        await self._aremember(resp.model_dump(mode="json", exclude_none=True), result)
+        return result
+
+    async def _arespond(self, resp) -> Dict[str, Any]:
+        leader = False
+
+        def shared():
+            # The prefetch is read by `respond`, so it is settled only once that is done,
+            # even when the request that started it has gone away in the meantime.
+            try:
+                return self._respond_own_session(resp)
+            finally:
+                self._settle_prefetch()
+
+        def start():
+            nonlocal leader
+            leader = True
+            return asyncio.to_thread(shared)
+
+        if self.respond_flight is None:
+            return await start()
+        key = (self.catalog_version, resp.model_dump_json())
+        try:
+            return await self.respond_flight.do(key, start)
+        finally:
+            if not leader:
+                # A follower shares the leader's answer; its own prefetched rows go unused.
+                self._settle_prefetch()
+
+    def _respond_own_session(self, resp) -> Dict[str, Any]:
+        """`respond` on a private session. A coalesced run can outlive the request that
+        started it, and that request's session is closed when the request ends."""
+        request_db = self.db
+        with Session(bind=request_db.get_bind(), expire_on_commit=False) as db:
+            self.db = db
+            try:
+                return self.respond(resp)
+            finally:
+                self.db = request_db
+
+    async def astream_query(self, user_message: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Streaming `arun_query`. Yields (event, data) pairs:
+
+        - "intent": the parsed intent, as soon as it is known
+        - "product": each product row as the DB resolution serializes it
+        - "final": the same payload `arun_query` returns
+        """
+        followup = await self._aresolve_followup(user_message)
+        if followup is not None:
+            yield "intent", {"query_type": followup.get("query_type"), "followup": True}
+            yield "final", followup
+            return
+
+        degraded = False
+        try:
+            resp = await self._aparse_intent(user_message)
+        except LLMUnavailableError as e:
+            print(f"LLM unavailable ({e}); falling back to local search")
+            resp, degraded = None, True
+        if not resp and not degraded:
+            yield "final", {"success": False, "error": "Could not understand query"}
+            return
+
+        if degraded:
+            yield "intent", {"query_type": "PRODUCT_SEARCH", "degraded": True}
+        else:
+            yield "intent", resp.model_dump(mode="json", exclude_none=True)
+
+        loop = asyncio.get_running_loop()
+        rows: asyncio.Queue = asyncio.Queue()
+
+        def work():
+            self._on_row = lambda row: loop.call_soon_threadsafe(rows.put_nowait, row)
+            try:
+                return self.degraded_search(user_message) if degraded else self.respond(resp)
+            finally:
+                self._on_row = None
+                self._settle_prefetch()
+
+        task = asyncio.ensure_future(asyncio.to_thread(work))
+        while not task.done():
+            getter = asyncio.ensure_future(rows.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield "product", getter.result()
+            else:
+                getter.cancel()
+        while not rows.empty():
+            yield "product", rows.get_nowait()
+        result = task.result()
+        yield "final", result
+        if not degraded:
+            await self._aremember(resp.model_dump(mode="json", exclude_none=True), result)
+
+    def respond(self, resp) -> Dict[str, Any]:
+        """Resolve a parsed `BotResponse` against the database and build the chat reply."""
+        resp = self._apply_aliases(resp)
+        if resp.query_type == "CART_ADD" and resp.items:
+            if len(resp.items) > 1:
+                return self._respond_cart_items(resp)
+            # A single listed item is an ordinary CART_ADD
+            only = resp.items[0]
+            resp = resp.model_copy(update={
+                "product_name": only.product_name, "brand": only.brand,
+                "quantity": only.quantity, "weight": only.weight, "items": None,
+            })
 
         qt = resp.query_type
 
         # PRICE_QUERY: return full product row, or suggestion, or similar list
         if qt == "PRICE_QUERY":
             name = resp.product_name
-            resolved = self.llm_service.resolve_product_name(name, self.products)
+            resolved = self.llm_service.resolve_product_name(name, self.products, index=self.product_index)
 
             if resolved.get("matched"):
                 prod = self._fetch_product_by_name(resolved["matched"], brand=resp.brand)
@@ -129,7 +699,7 @@ class SimpleShoppingAgent:
                 }
 
             # No close match — return similar product rows
-            sims = self.llm_service.search_similar(name, self.products, limit=5)
+            sims = self.llm_service.search_similar(name, self.products, limit=5, index=self.product_index)
             similar_names = [s[0] for s in sims]
             prods = self._fetch_products_by_names(similar_names, limit=5, brand=resp.brand)
             return {
@@ -144,7 +714,7 @@ class SimpleShoppingAgent:
         # CATEGORY_FILTER: query DB for category and return product rows
         if qt == "CATEGORY_FILTER":
             cat = (resp.category or "").strip()
-            products = self.db.query(models.Product).filter(models.Product.category.ilike(f"%{cat}%")).limit(resp.limit or 5).all()
+            products = self.db.query(models.Product).options(ROW_COLUMNS).filter(models.Product.category.ilike(f"%{cat}%")).limit(resp.limit or 5).all()
             if products:
                 return {
                     "success": True,
@@ -170,7 +740,7 @@ class SimpleShoppingAgent:
             prod = None
 
             # 1) Try resolving against sample product list first
-            resolved = self.llm_service.resolve_product_name(name, self.products)
+            resolved = self.llm_service.resolve_product_name(name, self.products, index=self.product_index)
             if resolved.get("matched"):
                 prod = self._fetch_product_by_name(resolved.get("matched"), brand=resp.brand)
 
@@ -204,7 +774,7 @@ class SimpleShoppingAgent:
                 }
 
             # 5) Fallback: show similar products
-            sims = self.llm_service.search_similar(name, self.products, limit=5)
+            sims = self.llm_service.search_similar(name, self.products, limit=5, index=self.product_index)
             similar_names = [s[0] for s in sims]
             prods = self._fetch_products_by_names(similar_names, limit=5, brand=resp.brand)
             return {
@@ -228,13 +798,12 @@ class SimpleShoppingAgent:
                     "confidence": resp.confidence,
                 }
             # Search by product name (partial match) to get all brands
-            query = self.db.query(models.Product).filter(
-                models.Product.product.ilike(f"%{name}%")
-            )
-            # If brand is specified, filter by it too
-            if resp.brand:
-                query = query.filter(models.Product.brand.ilike(f"%{resp.brand}%"))
-            products = query.order_by(models.Product.sale_price.asc()).limit(20).all()
+            prefetched = None if resp.brand else self._prefetched_search.get(name.lower())
+            if prefetched is not None:
+                self._prefetch_used = True
+                products = prefetched
+            else:
+                products = self._search_listing(name, resp.brand)
 
             if products:
                 # Group info for the message
@@ -248,6 +817,17 @@ class SimpleShoppingAgent:
                     "message": f"Found {len(products)} '{name}' products from brands: {brand_text}",
                     "confidence": resp.confidence,
                 }
+            related = self._semantic_products(name)
+            if related:
+                return {
+                    "success": True,
+                    "query_type": "PRODUCT_SEARCH",
+                    "action": "display_products",
+                    "products": [self._row_to_dict(p) for p in related],
+                    "message": f"No exact match for '{name}' — here are some related products",
+                    "confidence": resp.confidence,
+                    "semantic": True,
+                }
             return {
                 "success": False,
                 "query_type": "PRODUCT_SEARCH",
@@ -258,12 +838,13 @@ class SimpleShoppingAgent:
 
         # PRICE_FILTER: show products above/below/between a price range
         if qt == "PRICE_FILTER":
-            query = self.db.query(models.Product)
+            query = self.db.query(models.Product).options(ROW_COLUMNS)
 
             # Optionally filter by product name
             if resp.product_name:
+                terms = self._name_terms(resp.product_name)
                 query = query.filter(
-                    models.Product.product.ilike(f"%{resp.product_name.strip()}%")
+                    or_(*[models.Product.product.ilike(f"%{t}%") for t in terms])
                 )
             # Optionally filter by category
             if resp.category:
@@ -315,6 +896,16 @@ class SimpleShoppingAgent:
         return {"success": False, "query_type": "UNKNOWN", "message": "Unable to classify query", "confidence": resp.confidence}
 
 
-def create_agent(llm_service, db: Session, categories: List[str], products: List[str]) -> SimpleShoppingAgent:
+def create_agent(llm_service, db: Session, categories: List[str], products: List[str],
+                 intent_parser=None, brands: Optional[List[str]] = None, catalog_version: int = 0,
+                 deadline=None, respond_flight=None, session_store=None,
+                 user_id: Optional[str] = None, vocabulary=None, product_index=None,
+                 similarity_index=None, aliases=None, semantic_index=None,
+                 catalog_cache=None, compounds=frozenset()) -> SimpleShoppingAgent:
     """Factory: returns a DB-aware SimpleShoppingAgent."""
-    return SimpleShoppingAgent(llm_service, db, categories, products)
+    return SimpleShoppingAgent(llm_service, db, categories, products, intent_parser=intent_parser,
+                               brands=brands, catalog_version=catalog_version, deadline=deadline,
+                               respond_flight=respond_flight, session_store=session_store, user_id=user_id,
+                               vocabulary=vocabulary, product_index=product_index,
+                               similarity_index=similarity_index, aliases=aliases,
+                               semantic_index=semantic_index, catalog_cache=catalog_cache, compounds=compounds)
@@ -35,6 +35,14 @@ class CategoryFilterQuery(BaseModel):
     limit: int = Field(default=5, description="Number of products to return")
 
 
+class CartItemIntent(BaseModel):
+    """One product in a multi-item cart request ("add 2 milk, 1 bread and a dozen eggs")"""
+    product_name: str = Field(description="The product to add")
+    brand: Optional[str] = Field(default=None, description="Brand name if mentioned by user")
+    quantity: int = Field(default=1, description="Number of items to add", ge=1)
+    weight: Optional[str] = Field(default=None, description="Weight specification if mentioned")
+
+
 class BotResponse(BaseModel):
     """Unified response schema for LLM output"""
     query_type: QueryType
@@ -48,6 +56,7 @@ class BotResponse(BaseModel):
     min_price: Optional[float] = Field(default=None, description="Minimum price filter")
     max_price: Optional[float] = Field(default=None, description="Maximum price filter")
     confidence: float = Field(description="Confidence score 0-1", ge=0.0, le=1.0)
+    items: Optional[List[CartItemIntent]] = Field(default=None, description="Every product when one message asks for several")
 
     @classmethod
     def parse_obj(cls, obj):
@@ -9,17 +9,44 @@ Configuration (environment variables expected in `backend/.env`):
 - `LLM_PROVIDER` (optional): set to `groq` to use Groq. Default is `groq`.
 - `GROQ_API_URL`: The Groq LLM HTTP endpoint URL.
 - `GROQ_API_KEY`: Authorization key for the Groq API.
+- `GROQ_TIMEOUT_SECONDS` (optional, default 30): per-request timeout.
+- `GROQ_MAX_CONNECTIONS` (optional, default 100): size of the shared keep-alive pool.
+- `GROQ_MAX_RETRIES` (optional, default 1): retries for transient failures, with backoff.
+- `GROQ_BREAKER_THRESHOLD` / `GROQ_BREAKER_COOLDOWN_SECONDS` / `GROQ_BREAKER_MAX_COOLDOWN_SECONDS`:
+  circuit breaker tuning (see `circuit_breaker.py`).
+
+Parses from `parse_with_context` are cached per normalized message and catalog version
+(see `intent_cache.py` for the cache settings).
 """
 
-from typing import Optional, List
+from typing import Callable, Optional, List
 import os
 import re
 import json
+import time
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+try:
+    import httpx  # used by the async chat path
+except Exception:
+    httpx = None
+
 from llm_schemas import BotResponse, QueryType
 from utils import find_similar_products, match_or_suggest
+from intent_cache import IntentCache
+from circuit_breaker import CircuitBreaker, Deadline
+from singleflight import SingleFlight, AsyncSingleFlight
+
+# Below this much remaining budget an LLM call can't realistically succeed
+MIN_CALL_SECONDS = 0.25
+RETRY_BASE_SECONDS = 0.25
+
+
+class LLMUnavailableError(Exception):
+    """The LLM could not be used for this request (breaker open, budget spent or call failed)."""
 
 load_dotenv()
 
@@ -37,8 +64,23 @@ class ChatbotLLMService:
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
-    def _invoke_groq(self, prompt: str) -> Optional[str]:
-        """Call the Groq LLM endpoint (OpenAI-compatible) with a prompt."""
+        self.timeout = float(os.getenv("GROQ_TIMEOUT_SECONDS", "30"))
+        self.max_connections = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+        self._session = None
+        self._async_client = None
+        self.max_retries = int(os.getenv("GROQ_MAX_RETRIES", "1"))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("GROQ_BREAKER_THRESHOLD", "5")),
+            base_cooldown=float(os.getenv("GROQ_BREAKER_COOLDOWN_SECONDS", "2")),
+            max_cooldown=float(os.getenv("GROQ_BREAKER_MAX_COOLDOWN_SECONDS", "60")),
+        )
+        self.intent_cache = IntentCache.from_env()
+        # Concurrent identical messages share one in-flight LLM call
+        self.parse_flight = SingleFlight()
+        self.aparse_flight = AsyncSingleFlight()
+
+    def _groq_request(self, prompt: str):
+        """Build the (url, headers, payload) triple for an OpenAI-compatible chat completion."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -65,17 +107,128 @@ class ChatbotLLMService:
             "max_tokens": 1024,
             "response_format": {"type": "json_object"}
         }
-        
-        try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-
-            return data['choices'][0]['message']['content']
-        except Exception as e:
-            print(f"Error calling Groq API: {e} - Response: {resp.text if 'resp' in locals() else 'None'}")
+        return url, headers, payload
+
+    def _get_session(self) -> requests.Session:
+        """Shared keep-alive session for sync callers (reuses TLS connections)."""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """Shared keep-alive async client with a bounded connection pool."""
+        if httpx is None:
+            raise RuntimeError("httpx is required for the async chat path (pip install httpx)")
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return self._async_client
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _call_timeout(self, deadline: Optional[Deadline]) -> float:
+        """Per-call timeout: the configured timeout, clamped to the request's remaining budget."""
+        timeout = Deadline.clamp(self.timeout, deadline)
+        if timeout < MIN_CALL_SECONDS:
+            raise LLMUnavailableError("deadline budget exhausted")
+        return timeout
+
+    def _retry_delay(self, error: Exception, attempt: int, deadline: Optional[Deadline]) -> Optional[float]:
+        """Backoff before the next attempt, or None if we should give up now."""
+        if attempt >= self.max_retries:
+            return None
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is not None and status < 500 and status != 429:
+            return None  # client errors won't fix themselves
+        delay = RETRY_BASE_SECONDS * (2 ** attempt)
+        if deadline is not None and deadline.remaining() < delay + MIN_CALL_SECONDS:
+            return None
+        if not self.breaker.allow():
             return None
+        return delay
 
+    def _invoke_groq(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        """Call the Groq LLM endpoint (OpenAI-compatible) with a prompt.
+
+        Raises `LLMUnavailableError` when the breaker is open, the deadline is spent, or
+        the call keeps failing, so callers can degrade instead of waiting out a timeout.
+        """
+        timeout = self._call_timeout(deadline)
+        if not self.breaker.allow():
+            raise LLMUnavailableError("circuit breaker open")
+        url, headers, payload = self._groq_request(prompt)
+        attempt = 0
+        while True:
+            try:
+                resp = self._get_session().post(url, headers=headers, json=payload, timeout=timeout)
+                resp.raise_for_status()
+                data = resp.json()
+                content = data['choices'][0]['message']['content']
+            except Exception as e:
+                print(f"Error calling Groq API: {e} - Response: {resp.text if 'resp' in locals() else 'None'}")
+                self.breaker.record_failure()
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise LLMUnavailableError(str(e) or type(e).__name__) from e
+                time.sleep(delay)
+                attempt += 1
+                timeout = max(MIN_CALL_SECONDS, Deadline.clamp(self.timeout, deadline))
+                continue
+            self.breaker.record_success()
+            return content
+
+    async def _ainvoke_groq(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        """Async variant of `_invoke_groq` on the pooled httpx client."""
+        timeout = self._call_timeout(deadline)
+        if not self.breaker.allow():
+            raise LLMUnavailableError("circuit breaker open")
+        url, headers, payload = self._groq_request(prompt)
+        attempt = 0
+        # True while the breaker let a call through whose outcome isn't recorded yet
+        pending = True
+        try:
+            while True:
+                try:
+                    resp = await self._get_async_client().post(url, headers=headers, json=payload, timeout=timeout)
+                    resp.raise_for_status()
+                    data = resp.json()
+                    content = data['choices'][0]['message']['content']
+                except Exception as e:
+                    print(f"Error calling Groq API (async): {e!r} - Response: {resp.text if 'resp' in locals() else 'None'}")
+                    pending = False
+                    self.breaker.record_failure()
+                    delay = self._retry_delay(e, attempt, deadline)
+                    if delay is None:
+                        raise LLMUnavailableError(str(e) or type(e).__name__) from e
+                    pending = True
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    timeout = max(MIN_CALL_SECONDS, Deadline.clamp(self.timeout, deadline))
+                    continue
+                pending = False
+                self.breaker.record_success()
+                return content
+        finally:
+            if pending:
+                # Cancelled mid-call (client disconnect, closed stream): a half-open probe
+                # would otherwise hold its slot forever
+                self.breaker.release()
 
     def _extract_json_from_text(self, text: str) -> Optional[dict]:
         if not text:
@@ -127,7 +280,10 @@ User: "Show me Hero banana"
 Response: {{"query_type":"PRICE_QUERY","action":"fetch_price","product_name":"banana","brand":"Hero","quantity":null,"category":null,"weight":null,"confidence":0.95}}
 """
 
-        raw = self._invoke_groq(prompt)
+        try:
+            raw = self._invoke_groq(prompt)
+        except LLMUnavailableError:
+            raw = None
         parsed = self._extract_json_from_text(raw) if raw else None
         if not parsed:
             print("LLM returned no JSON or unparsable output:\n", raw)
@@ -138,7 +294,7 @@ Response: {{"query_type":"PRICE_QUERY","action":"fetch_price","product_name":"ba
             print(f"BotResponse validation failed: {e} - parsed: {parsed}")
             return None
 
-    def parse_with_context(self, user_message: str, available_categories: List[str], available_products: List[str]) -> Optional[BotResponse]:
+    def _context_prompt(self, user_message: str, available_categories: List[str], available_products: List[str]) -> str:
         categories_str = ", ".join(available_categories[:20])
         products_str = ", ".join(available_products[:15])
 
@@ -159,12 +315,13 @@ Return a JSON object with strictly these fields:
 - min_price: number or null (minimum price threshold the user wants)
 - max_price: number or null (maximum price threshold the user wants)
 - confidence: number
+- items: list or null. ONLY when the user asks for several different products in one message: one object per product with product_name, brand, quantity, weight
 
 IMPORTANT RULES for query_type selection:
 - Use PRODUCT_SEARCH when the user wants to see/show/browse a specific product type across all brands. Examples: "show me rice", "I want to see milk", "what toothpaste do you have", "show me all shampoo"
 - Use PRICE_FILTER when the user asks to see products above/below/between a certain price. Examples: "show products above 150", "items under 200", "products between 100 and 500"
 - Use PRICE_QUERY when the user asks for the price of one specific product (e.g. "what is the price of Amul butter")
-- Use CART_ADD when the user explicitly wants to add to cart
+- Use CART_ADD when the user explicitly wants to add to cart. If they list several products ("add 2 milk, 1 bread and a dozen eggs"), fill `items` with every product and leave product_name null
 - Use CATEGORY_FILTER when the user mentions a broad category like "beauty", "dairy", "grocery"
 
 Examples:
@@ -174,40 +331,84 @@ Examples:
 {{"query_type": "PRICE_FILTER", "action": "filter_by_price", "product_name": null, "brand": null, "quantity": null, "category": null, "weight": null, "min_price": 150, "max_price": null, "confidence": 0.95}}
 {{"query_type": "PRICE_FILTER", "action": "filter_by_price", "product_name": "rice", "brand": null, "quantity": null, "category": null, "weight": null, "min_price": 150, "max_price": null, "confidence": 0.9}}
 {{"query_type": "PRICE_FILTER", "action": "filter_by_price", "product_name": null, "brand": null, "quantity": null, "category": null, "weight": null, "min_price": null, "max_price": 200, "confidence": 0.9}}
+{{"query_type": "CART_ADD", "action": "add_to_cart", "product_name": null, "brand": null, "quantity": null, "category": null, "weight": null, "min_price": null, "max_price": null, "confidence": 0.9, "items": [{{"product_name": "milk", "brand": null, "quantity": 2, "weight": null}}, {{"product_name": "bread", "brand": null, "quantity": 1, "weight": null}}, {{"product_name": "eggs", "brand": null, "quantity": 12, "weight": null}}]}}
 """
-        raw = self._invoke_groq(prompt)
+        return prompt
+
+    def _finish_context_parse(self, raw: Optional[str], user_message: str, catalog_version: int) -> Optional[BotResponse]:
         parsed = self._extract_json_from_text(raw) if raw else None
         if not parsed:
             print("LLM (context) returned no JSON or unparsable output:\n", raw)
             return None
         try:
-            return BotResponse.parse_obj(parsed)
+            resp = BotResponse.parse_obj(parsed)
         except Exception as e:
             print(f"BotResponse validation failed (context): {e} - parsed: {parsed}")
             return None
+        self.intent_cache.set(user_message, catalog_version, resp)
+        return resp
+
+    def parse_with_context(self, user_message: str, available_categories: List[str], available_products: List[str], catalog_version: int = 0, deadline: Optional[Deadline] = None) -> Optional[BotResponse]:
+        """Parse a message into a `BotResponse`. Raises `LLMUnavailableError` if the LLM can't answer in time."""
+        cached = self.intent_cache.get(user_message, catalog_version)
+        if cached is not None:
+            return cached
+
+        def call():
+            prompt = self._context_prompt(user_message, available_categories, available_products)
+            raw = self._invoke_groq(prompt, deadline=deadline)
+            return self._finish_context_parse(raw, user_message, catalog_version)
+
+        return self.parse_flight.do(self.intent_cache.make_key(user_message, catalog_version), call)
+
+    async def aparse_with_context(self, user_message: str, available_categories: List[str], available_products: List[str], catalog_version: int = 0, deadline: Optional[Deadline] = None,
+                                  on_miss: Optional[Callable[[], None]] = None) -> Optional[BotResponse]:
+        """Async `parse_with_context`: awaits the LLM on the pooled client instead of blocking a thread.
+        `on_miss` runs only when the intent cache can't answer, just before the LLM wait."""
+        cached = self.intent_cache.get(user_message, catalog_version)
+        if cached is not None:
+            return cached
+        if on_miss is not None:
+            on_miss()
+
+        async def call():
+            prompt = self._context_prompt(user_message, available_categories, available_products)
+            raw = await self._ainvoke_groq(prompt, deadline=deadline)
+            return self._finish_context_parse(raw, user_message, catalog_version)
+
+        return await self.aparse_flight.do(self.intent_cache.make_key(user_message, catalog_version), call)
 
     def extract_entities(self, user_message: str) -> dict:
         prompt = f"""
 Extract entities from this shopping query and return a JSON object with keys: product_name, quantity, category, weight, keyword.
 User Message: {user_message}
 """
-        raw = self._invoke_groq(prompt)
+        try:
+            raw = self._invoke_groq(prompt)
+        except LLMUnavailableError:
+            return {}
         parsed = self._extract_json_from_text(raw) if raw else None
         return parsed or {}
 
     # ----- Product matching & suggestion helpers -----
-    def resolve_product_name(self, product_name: str, available_products: List[str]):
+    def resolve_product_name(self, product_name: str, available_products: List[str], index=None):
         """
         Try to resolve a user-provided product name against the available products.
+        With a `trigram_index.TrigramIndex`, the whole catalog is searched instead of the list.
         Returns a dict with keys: matched (exact), suggestion (if any), score, ask_confirmation (bool)
         """
-        matched, suggestion, score = match_or_suggest(product_name or "", available_products)
+        if index is not None and len(index):
+            matched, suggestion, score = index.match_or_suggest(product_name or "")
+        else:
+            matched, suggestion, score = match_or_suggest(product_name or "", available_products)
         result = {"matched": matched, "suggestion": suggestion, "score": score}
         # Ask confirmation if only a suggestion is available
         result["ask_confirmation"] = True if (matched is None and suggestion is not None) else False
         return result
 
-    def search_similar(self, product_name: str, available_products: List[str], limit: int = 5):
-        """Return list of similar products with score."""
+    def search_similar(self, product_name: str, available_products: List[str], limit: int = 5, index=None):
+        """Return list of similar products with score (over the whole catalog when `index` is given)."""
+        if index is not None and len(index):
+            return index.find_similar(product_name or "", limit=limit)
         return find_similar_products(product_name or "", available_products, limit=limit)
 
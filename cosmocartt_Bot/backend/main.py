@@ -1,10 +1,22 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from typing import List, Optional
 import models, schemas, database
+from singleflight import SingleFlight, AsyncSingleFlight
+from synonyms import AliasMatcher
+from catalog_context import CatalogContext
+from product_search import ProductSearch
+import pagination
+import projection
+import facets
+from fast_response import CompressionMiddleware, FastJSONResponse, dumps
+from catalog_cache import CatalogCache, normalize_search
+from catalog_version import get_catalog_version
 import random
+import os
 from pydantic import BaseModel
 
 models.Base.metadata.create_all(bind=database.engine)
@@ -21,8 +33,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Did-You-Mean", "X-Next-Cursor"],
 )
 
+# gzip / brotli for JSON bodies above the threshold; the chat SSE stream passes through
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")))
+
 from fastapi.staticfiles import StaticFiles
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -88,17 +104,157 @@ def verify_otp(request: VerifyRequest, db: Session = Depends(database.get_db)):
     
     raise HTTPException(status_code=400, detail="Incorrect OTP")
 
-@app.get("/products", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, search: Optional[str] = None, category: Optional[str] = None, sub_category: Optional[str] = None, db: Session = Depends(database.get_db)):
-    query = db.query(models.Product)
+# Identical concurrent catalog queries share one DB round trip
+products_flight = SingleFlight()
+
+# Product rows and /products responses, dropped when the catalog version moves
+catalog_cache = CatalogCache.from_env()
+
+# Grocery aliases ("dahi" -> curd), hot-reloaded from aliases.json and product_aliases
+alias_matcher = AliasMatcher.from_env()
+
+# Categories, brands, vocabulary and spelling shared by every chat turn and by search
+# typo correction, rebuilt on catalog change
+catalog_context = CatalogContext.from_env()
+
+# tsvector / FTS5 ranked search when migrated, ilike otherwise
+product_search = ProductSearch()
+
+# Responses are serialized by hand (projections drop columns), so the docs use the partial schema
+@app.get("/products", response_class=FastJSONResponse, responses={200: {"model": List[schemas.ProductFields]}})
+def read_products(skip: int = 0, limit: int = pagination.DEFAULT_PAGE_SIZE, search: Optional[str] = None, category: Optional[str] = None, sub_category: Optional[str] = None, cursor: Optional[str] = None, sort: Optional[str] = None, fields: Optional[str] = None,
+                  brand: Optional[str] = None, price: Optional[str] = None, is_veg: Optional[bool] = None, rating: Optional[str] = None, db: Session = Depends(database.get_db)):
+    _check_sort(sort)
+    if cursor and skip:
+        # A cursor already says where the page starts
+        raise HTTPException(status_code=400, detail="skip can't be combined with cursor")
+    limit = max(1, min(limit, pagination.MAX_PAGE_SIZE))
+    selected = _parse_fields(fields)
+    filters = _parse_filters(brand, price, is_veg, rating)
+    search = normalize_search(search)
+    key = ("products", skip, limit, search, category, sub_category, cursor, sort, tuple(selected), tuple(sorted(filters.items())))
+    version = get_catalog_version(db)
+    cached = catalog_cache.get("query", key, version)
+    if cached is None:
+        try:
+            products, suggestion, next_cursor = products_flight.do(key, lambda: _search_products(db, skip, limit, search, category, sub_category, cursor, sort, selected, filters))
+        except pagination.InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        headers = {}
+        if suggestion:
+            # The results are already for the corrected search; the client just shows "did you mean"
+            headers["X-Did-You-Mean"] = suggestion
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # Rows are already shaped like schemas.Product: serialized once, no response_model pass
+        cached = (dumps(products), headers)
+        catalog_cache.put("query", key, version, cached, size=len(cached[0]))
+    body, headers = cached
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/products/facets")
+def read_product_facets(limit: int = pagination.DEFAULT_PAGE_SIZE, search: Optional[str] = None, category: Optional[str] = None, sub_category: Optional[str] = None, sort: Optional[str] = None, fields: Optional[str] = None,
+                        brand: Optional[str] = None, price: Optional[str] = None, is_veg: Optional[bool] = None, rating: Optional[str] = None, db: Session = Depends(database.get_db)):
+    """First result page plus facet counts over every matching product. Further pages come
+    from `/products` with the same filters and `cursor=next_cursor`."""
+    _check_sort(sort)
+    limit = max(1, min(limit, pagination.MAX_PAGE_SIZE))
+    selected = _parse_fields(fields)
+    filters = _parse_filters(brand, price, is_veg, rating)
+    search = normalize_search(search)
+    key = ("facets", limit, search, category, sub_category, sort, tuple(selected), tuple(sorted(filters.items())))
+    version = get_catalog_version(db)
+    body = catalog_cache.get("facets", key, version)
+    if body is None:
+        body = dumps(products_flight.do(key, lambda: _facet_page(db, limit, search, category, sub_category, sort, selected, filters)))
+        catalog_cache.put("facets", key, version, body, size=len(body))
+    return Response(content=body, media_type="application/json")
+
+def _facet_page(db: Session, limit: int, search: Optional[str], category: Optional[str], sub_category: Optional[str], sort: Optional[str], fields: List[str], filters: dict) -> dict:
+    products, suggestion, next_cursor = _search_products(db, 0, limit, search, category, sub_category, None, sort, fields, filters)
+    # Counts describe the rows actually shown, i.e. the corrected search when there was one.
+    # Every filter is left to `facets.count`, which drops each facet's own when counting it.
+    scope = {name: value for name, value in (("category", category), ("sub_category", sub_category)) if value}
+    scope.update(filters)
+    scoped = _filtered_query(db, facets.columns(scope), suggestion or search, None, None, ranked=False)
+    return {"products": products, "next_cursor": next_cursor, "did_you_mean": suggestion, **facets.count(db, scoped, scope)}
+
+def _check_sort(sort: Optional[str]):
+    # No sort: searches come best match first, listings in index order
+    if sort is not None and sort not in pagination.SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(pagination.SORT_KEYS)}")
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    try:
+        return projection.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _parse_filters(brand: Optional[str], price: Optional[str], is_veg: Optional[bool], rating: Optional[str]) -> dict:
+    try:
+        return facets.parse_filters(brand, price, is_veg, rating)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _search_products(db: Session, skip: int, limit: int, search: Optional[str], category: Optional[str], sub_category: Optional[str], cursor: Optional[str], sort: Optional[str], fields: List[str], filters: Optional[dict] = None):
+    """(products, corrected search or None, next-page cursor or None). A search with no
+    hits is re-run once with its typos corrected against the catalog vocabulary
+    ("tomatoe" -> "tomato")."""
+    products, next_cursor = _query_products(db, skip, limit, search, category, sub_category, cursor, sort, fields, filters)
+    if products or not search or skip or cursor:
+        return products, None, next_cursor
+    spelling = catalog_context.get(db).spelling
+    suggestion = spelling.correct(alias_matcher.normalize(search)) if spelling is not None else None
+    if not suggestion:
+        return products, None, None
+    products, next_cursor = _query_products(db, skip, limit, suggestion, category, sub_category, None, sort, fields, filters)
+    return products, suggestion, next_cursor
+
+def _query_products(db: Session, skip: int, limit: int, search: Optional[str], category: Optional[str], sub_category: Optional[str], cursor: Optional[str] = None, sort: Optional[str] = None, fields: Optional[List[str]] = None, filters: Optional[dict] = None):
+    fields = fields or projection.PRODUCT_FIELDS
+    # A search without an explicit sort is ranked by relevance; with one, its matches are
+    # a listing in that order
+    ranked = bool(search) and sort is None
+    sort = sort or "index"
+    # Only the requested columns are read; the sort column rides along for the cursor
+    selected = fields + [f for f in pagination.SORT_FIELDS.get(sort, ()) if f not in fields]
+    query = _filtered_query(db, projection.columns(selected), search, category, sub_category, filters, ranked=ranked)
+
+    if ranked:
+        # Ranked results: the cursor carries an offset
+        offset = skip + pagination.offset_of(cursor)
+        rows = [dict(zip(selected, r)) for r in query.offset(offset).limit(limit + 1)]
+        next_cursor = pagination.offset_next(offset, len(rows), limit)
+    else:
+        # Listings: keyset pages on (sort key, index), same cost at any depth
+        rows = [dict(zip(selected, r)) for r in pagination.keyset_page(query, sort, cursor, limit).offset(skip)]
+        next_cursor = pagination.keyset_next(rows, sort, limit)
+
+    rows = rows[:limit]
+    if len(selected) > len(fields):
+        for row in rows:
+            for f in selected[len(fields):]:
+                del row[f]
+    # Plain dicts, so waiters sharing the result don't touch the leader's session
+    return rows, next_cursor
+
+def _filtered_query(db: Session, columns: list, search: Optional[str], category: Optional[str], sub_category: Optional[str], filters: Optional[dict] = None, ranked: bool = True):
+    """`columns` of the products matching the filters; searches are ordered best match
+    first unless `ranked=False`."""
+    query = db.query(*columns)
     if search:
+        alias_matcher.maybe_reload(db)
+        # Alias spellings ("dahi") also search their canonical term ("curd")
+        normalized = alias_matcher.normalize(search)
+        terms = search.split() + (normalized.split() if normalized != search else [])
         # Support multi-keyword search (OR logic)
-        keywords = [k.strip() for k in search.split() if len(k.strip()) > 2]
+        keywords = list(dict.fromkeys(k.strip() for k in terms if len(k.strip()) > 2))
         if keywords:
-            conditions = [models.Product.product.ilike(f"%{k}%") for k in keywords]
-            query = query.filter(or_(*conditions))
+            query = product_search.apply(query, db, keywords, ranked=ranked)
         else:
             query = query.filter(models.Product.product.ilike(f"%{search}%"))
+            if ranked:
+                query = query.order_by(models.Product.index)
             
     if category:
         query = query.filter(models.Product.category == category)
@@ -106,43 +262,102 @@ def read_products(skip: int = 0, limit: int = 100, search: Optional[str] = None,
     # NEW: Sub-category filter
     if sub_category:
         query = query.filter(models.Product.sub_category == sub_category)
-    
-    return query.offset(skip).limit(limit).all()
 
-@app.get("/products/{product_id}", response_model=schemas.Product)
-def read_product(product_id: int, db: Session = Depends(database.get_db)):
-    db_product = db.query(models.Product).filter(models.Product.index == product_id).first()
-    if db_product is None:
+    if filters:
+        query = facets.apply_filters(query, filters)
+    return query
+
+@app.post("/products/batch", response_class=FastJSONResponse, responses={200: {"model": List[schemas.ProductFields]}})
+def read_products_batch(request: schemas.ProductIds, fields: Optional[str] = None, db: Session = Depends(database.get_db)):
+    """Current rows for a cart or order's product ids, in request order; unknown ids are
+    left out. Rows missing from the catalog cache are read in one `IN` query."""
+    selected = _parse_fields(fields)
+    ids = list(dict.fromkeys(request.ids))
+    if len(ids) > pagination.MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"at most {pagination.MAX_PAGE_SIZE} ids per request")
+    version = get_catalog_version(db)
+    rows = catalog_cache.get_many("product", ids, version)
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        for values in db.query(*projection.columns(projection.PRODUCT_FIELDS)).filter(models.Product.index.in_(missing)):
+            row = dict(zip(projection.PRODUCT_FIELDS, values))
+            rows[row["index"]] = row
+            catalog_cache.put("product", row["index"], version, row)
+    return FastJSONResponse([{f: rows[i][f] for f in selected} for i in ids if i in rows])
+
+def _product_row(db: Session, product_id: int) -> Optional[dict]:
+    row = db.query(*projection.columns(projection.PRODUCT_FIELDS)).filter(models.Product.index == product_id).first()
+    return dict(zip(projection.PRODUCT_FIELDS, row)) if row is not None else None
+
+@app.get("/products/{product_id}", response_class=FastJSONResponse, responses={200: {"model": schemas.ProductFields}})
+def read_product(product_id: int, fields: Optional[str] = None, db: Session = Depends(database.get_db)):
+    selected = _parse_fields(fields)
+    # The full row is cached; projections are cut from it
+    row = catalog_cache.get_or_load("product", product_id, get_catalog_version(db), lambda: _product_row(db, product_id))
+    if row is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    return FastJSONResponse({f: row[f] for f in selected})
 
 @app.get("/categories")
 def read_categories(db: Session = Depends(database.get_db)):
     # Distinct categories
-    return [r[0] for r in db.query(models.Product.category).distinct()]
+    return catalog_cache.get_or_load("categories", None, get_catalog_version(db),
+                                     lambda: [r[0] for r in db.query(models.Product.category).distinct()])
+
+def _revalidated(request: Request, etag: str, payload) -> Response:
+    """`payload` as JSON with an ETag, or an empty 304 when the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    sent = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+    if etag in sent or "*" in sent:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(payload, headers=headers)
 
 @app.get("/subcategories")
-def read_subcategories(category: str, db: Session = Depends(database.get_db)):
-    # Get distinct sub-categories
-    subcats = db.query(models.Product.sub_category).filter(models.Product.category == category).distinct().all()
-    results = []
-    for (sub_name,) in subcats:
-        if not sub_name: continue
-        # Get one image for this subcategory
-        product = db.query(models.Product).filter(models.Product.category == category, models.Product.sub_category == sub_name).first()
-        image = product.image_url if product else None
-        results.append({"name": sub_name, "image": image})
-    return results
+def read_subcategories(category: str, request: Request, db: Session = Depends(database.get_db)):
+    # Served from the in-memory category tree, rebuilt when the catalog changes
+    etag, subs = catalog_context.get(db).subcategories(category)
+    return _revalidated(request, etag, subs)
+
+@app.get("/categories/tree")
+def read_category_tree(request: Request, db: Session = Depends(database.get_db)):
+    # category -> [{name, image, count}] for every sub-category
+    snapshot = catalog_context.get(db)
+    return _revalidated(request, snapshot.tree_etag, snapshot.category_tree)
 
 # ============= LangChain Chat Integration =============
 from pydantic import BaseModel
 from llm_service import ChatbotLLMService
 from llm_schemas import QueryType
 from langchain_agents import create_agent
+from intent_parser import RuleBasedIntentParser
+from circuit_breaker import Deadline
+from session_store import SessionStore
+from semantic_index import SemanticIndex
+from prefetch import prefetch_stats
+import os
+import json
+
+# Total time budget for one chat turn; the LLM call is clamped to what's left of it
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "8"))
 
 # Initialize LLM service (singleton pattern)
 llm_service = None
 
+# Rule-based fast path shared across requests so its hit rate covers all traffic
+intent_parser = RuleBasedIntentParser()
+
+# Identical concurrent chat intents share one DB resolution
+chat_flight = AsyncSingleFlight()
+
+# Per-user memory of the last reply, for follow-ups like "add two of those"
+session_store = SessionStore.from_env()
+
+# Offline-built semantic product index (scripts/build_semantic_index.py), memory-mapped
+SEMANTIC_INDEX_PATH = os.getenv("SEMANTIC_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "semantic_index"))
+semantic_index = SemanticIndex.load(SEMANTIC_INDEX_PATH)
+if semantic_index is not None:
+    print(f"Semantic index loaded: {semantic_index.stats()}")
+
 def get_llm_service():
     global llm_service
     if llm_service is None:
@@ -153,11 +368,55 @@ def get_llm_service():
             return None
     return llm_service
 
+@app.on_event("shutdown")
+async def close_llm_service():
+    # Release pooled keep-alive connections to the LLM provider
+    if llm_service is not None:
+        await llm_service.aclose()
+
 class ChatQuery(BaseModel):
     message: str = "User query to process"
+    user_id: Optional[str] = None
+
+def _chat_context(db: Session):
+    """Shared catalog snapshot for the agent. Usually no DB work at all; a stale snapshot
+    is rebuilt here (blocking, so this runs in the threadpool)."""
+    snapshot = catalog_context.get(db)
+    alias_matcher.maybe_reload(db)
+    # Hand the connection back to the pool before the (long) LLM wait; the session
+    # checks out a fresh one when the agent resolves products afterwards.
+    db.close()
+    return snapshot
+
+CHAT_UNAVAILABLE = {
+    "error": "LLM service not available",
+    "query_type": "UNKNOWN",
+    "message": "Chat service is temporarily unavailable. Please try the regular search."
+}
+
+async def _build_agent(service, db: Session, user_id: Optional[str] = None):
+    deadline = Deadline(CHAT_DEADLINE_SECONDS)
+    snapshot = await run_in_threadpool(_chat_context, db)
+
+    # Create DB-aware agent. The LLM call is awaited on a pooled keep-alive client,
+    # so a worker can hold many in-flight chats at once.
+    return create_agent(service, db, snapshot.categories, snapshot.sample_products, intent_parser=intent_parser,
+                        brands=snapshot.brands, catalog_version=snapshot.version, deadline=deadline,
+                        respond_flight=chat_flight, session_store=session_store, user_id=user_id,
+                        vocabulary=snapshot.vocabulary, product_index=snapshot.product_index,
+                        similarity_index=snapshot.similarity_index, aliases=alias_matcher,
+                        semantic_index=semantic_index, catalog_cache=catalog_cache, compounds=snapshot.compounds)
+
+def _chat_error(e: Exception) -> dict:
+    print(f"Error in chat endpoint: {str(e)}")
+    return {
+        "error": str(e),
+        "query_type": "UNKNOWN",
+        "message": "An error occurred while processing your request. Please try again."
+    }
 
 @app.post("/api/chat")
-def process_chat_query(query: ChatQuery, db: Session = Depends(database.get_db)):
+async def process_chat_query(query: ChatQuery, db: Session = Depends(database.get_db)):
     """
     Process user query using LangChain LLM and return structured response.
     
@@ -171,31 +430,70 @@ def process_chat_query(query: ChatQuery, db: Session = Depends(database.get_db))
     
     service = get_llm_service()
     if service is None:
-        return {
-            "error": "LLM service not available",
-            "query_type": "UNKNOWN",
-            "message": "Chat service is temporarily unavailable. Please try the regular search."
-        }
+        return CHAT_UNAVAILABLE
     
     try:
-        # Get available categories and products for context
-        categories = [r[0] for r in db.query(models.Product.category).distinct().all()]
-        sample_products = [r[0] for r in db.query(models.Product.product).limit(30).all()]
-
-        # Create DB-aware agent and delegate the query
-        agent = create_agent(service, db, categories, sample_products)
-        agent_result = agent.run_query(query.message)
+        agent = await _build_agent(service, db, query.user_id)
+        agent_result = await agent.arun_query(query.message)
 
         # Return agent result directly (already contains messages and product rows)
         return agent_result
     
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
-        return {
-            "error": str(e),
-            "query_type": "UNKNOWN",
-            "message": "An error occurred while processing your request. Please try again."
-        }
+        return _chat_error(e)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/chat/stream")
+async def stream_chat_query(query: ChatQuery):
+    """
+    Server-Sent Events variant of /api/chat.
+
+    Emits `intent` as soon as the message is parsed, one `product` event per row as
+    it is resolved, then `final` with the same payload /api/chat would return.
+    """
+    service = get_llm_service()
+
+    async def events():
+        if service is None:
+            yield _sse("final", CHAT_UNAVAILABLE)
+            return
+        # Own session: it must stay open for the whole stream, not just the handler
+        db = database.SessionLocal()
+        try:
+            agent = await _build_agent(service, db, query.user_id)
+            async for event, data in agent.astream_query(query.message):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("final", _chat_error(e))
+        finally:
+            db.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/chat/stats")
+def chat_stats():
+    """How many chat messages were answered without an LLM call."""
+    stats = {
+        "intent_parser": intent_parser.stats(),
+        "singleflight": {"chat_db": chat_flight.stats(), "products": products_flight.stats()},
+        "sessions": session_store.stats(),
+        "prefetch": prefetch_stats.stats(),
+        "catalog_context": catalog_context.stats(),
+        "aliases": alias_matcher.stats(),
+        "product_search": product_search.stats(),
+        "catalog_cache": catalog_cache.stats(),
+    }
+    if semantic_index is not None:
+        stats["semantic_index"] = semantic_index.stats()
+    if llm_service is not None:
+        stats["intent_cache"] = llm_service.intent_cache.stats()
+        stats["llm_breaker"] = llm_service.breaker.stats()
+        stats["singleflight"]["llm"] = llm_service.aparse_flight.stats()
+        stats["singleflight"]["llm_sync"] = llm_service.parse_flight.stats()
+    return stats
 
 # ======================================================
 
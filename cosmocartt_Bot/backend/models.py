@@ -1,8 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, Index, DDL, event, func, text
 from database import Base
 
 class Product(Base):
     __tablename__ = "products_v2"
+    __table_args__ = (
+        # Case-insensitive exact / prefix name lookups
+        Index("ix_products_v2_product_lower", func.lower(text("product"))),
+        # Substring (LIKE '%name%') lookups on Postgres; see scripts/migrate_product_indexes.py
+        Index("ix_products_v2_product_trgm", text("lower(product) gin_trgm_ops"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Keyset pages of a category / sub-category listing (see pagination.py)
+        Index("ix_products_v2_category_index", "category", "index"),
+        Index("ix_products_v2_category_sub_index", "category", "sub_category", "index"),
+        # ... and of a category listing with sort=name / sort=price (the `pagination.SORT_KEYS` expressions)
+        Index("ix_products_v2_category_name_index", "category", text("coalesce(product, '')"), "index"),
+        Index("ix_products_v2_category_price_index", "category", text("coalesce(sale_price, 0.0)"), "index"),
+    )
 
     index = Column(Integer, primary_key=True, index=True)
     product = Column(String, index=True)
@@ -26,6 +39,12 @@ class Product(Base):
     expiry_date = Column(String, index=True)
     stock = Column(Integer, default=0)
 
+# The trigram index needs the pg_trgm extension before the table (and its indexes) exist
+event.listen(
+    Product.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 from sqlalchemy import ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 import datetime
@@ -84,3 +103,21 @@ class OTP(Base):
     otp_code = Column(String)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+
+class CatalogMeta(Base):
+    __tablename__ = "catalog_meta"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ProductAlias(Base):
+    """Learned search alias (see synonyms.AliasMatcher): `alias` is rewritten to `canonical`."""
+    __tablename__ = "product_aliases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    alias = Column(String, unique=True, index=True, nullable=False)
+    canonical = Column(String, nullable=False)
+    kind = Column(String, default="product")
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
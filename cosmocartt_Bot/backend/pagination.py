@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination for `/products` listings.
+
+`offset(skip)` makes the database walk and discard every earlier row, so deep pages get
+linearly slower, and rows shift between pages while stock or prices change. A cursor
+page instead continues strictly after the last row it returned: listings are ordered by
+(sort_key, index) and the next page filters `(sort_key, index) > (last value, last index)`,
+which an index on the filter columns plus `index` answers at the same cost at any depth.
+
+Tokens are opaque to clients (urlsafe base64 of JSON) and carry the sort they were made
+for. Ranked searches (no `sort=`) have no stable key to continue from, so their tokens
+hold an offset; search pages are shallow. A search with an explicit `sort=` is paged like a
+listing.
+"""
+
+from typing import Any, List, Optional
+import base64
+import json
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+import models
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+SORT_KEYS = {
+    "index": None,
+    "name": func.coalesce(models.Product.product, ""),
+    "price": func.coalesce(models.Product.sale_price, 0.0),
+}
+
+
+# Row fields a cursor needs besides `index`
+SORT_FIELDS = {"index": (), "name": ("product",), "price": ("sale_price",)}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode(token: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except Exception:
+        raise InvalidCursor("malformed cursor")
+    if not isinstance(payload, dict):
+        raise InvalidCursor("malformed cursor")
+    return payload
+
+
+def _sort_value(product: dict, sort: str) -> Any:
+    if sort == "name":
+        return product["product"] or ""
+    if sort == "price":
+        return product["sale_price"] or 0.0
+    return None
+
+
+def keyset_page(query: Query, sort: str, cursor: Optional[str], limit: int) -> Query:
+    """`query` ordered by (sort key, index), continuing after `cursor`, `limit` + 1 rows
+    (the extra row only tells whether there is a next page)."""
+    key = SORT_KEYS[sort]
+    if cursor:
+        payload = decode(cursor)
+        if payload.get("s") != sort or "i" not in payload:
+            raise InvalidCursor("cursor does not belong to this listing")
+        if key is None:
+            query = query.filter(models.Product.index > payload["i"])
+        else:
+            query = query.filter(tuple_(key, models.Product.index) > tuple_(payload["v"], payload["i"]))
+    order = [models.Product.index] if key is None else [key, models.Product.index]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def keyset_next(rows: List[dict], sort: str, limit: int) -> Optional[str]:
+    """Token for the page after `rows` (fetched with `keyset_page`), or None at the end."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    payload = {"s": sort, "i": last["index"]}
+    if SORT_KEYS[sort] is not None:
+        payload["v"] = _sort_value(last, sort)
+    return encode(payload)
+
+
+def offset_of(cursor: Optional[str]) -> int:
+    """Offset carried by a ranked-search cursor (0 without one)."""
+    if not cursor:
+        return 0
+    payload = decode(cursor)
+    if not isinstance(payload.get("o"), int) or payload["o"] < 0:
+        raise InvalidCursor("cursor does not belong to this search")
+    return payload["o"]
+
+
+def offset_next(offset: int, returned: int, limit: int) -> Optional[str]:
+    return encode({"o": offset + limit}) if returned > limit else None
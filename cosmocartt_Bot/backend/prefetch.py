@@ -0,0 +1,97 @@
+"""
+Speculative product prefetch.
+
+While the LLM parses a message, the DB sits idle, and only afterwards do the product
+lookups start, so the two latencies add up. The agent instead pulls likely product nouns
+straight out of the raw message (words the catalog actually uses) and warms their
+lookups in a worker thread during the LLM wait. When the intent arrives, prefetched rows
+are reused if the intent names the same product and discarded otherwise.
+
+The turn never waits for a prefetch: once the intent is known, a prefetch still running
+gets `PREFETCH_GRACE_SECONDS` (default 0.05) to finish and is dropped after that.
+"""
+
+from typing import FrozenSet, Iterable, List
+import os
+import re
+import threading
+
+PREFETCH_GRACE_SECONDS = float(os.getenv("PREFETCH_GRACE_SECONDS", "0.05"))
+
+# Words that appear in product names but never identify one on their own
+VOCAB_STOPWORDS = {
+    "and", "the", "for", "with", "pack", "of", "combo", "new", "free", "fresh", "pcs",
+    "kg", "gm", "ml", "ltr", "per", "pouch", "box", "bottle", "jar", "can", "set",
+}
+
+
+def build_vocabulary(product_names: Iterable[str]) -> FrozenSet[str]:
+    """Lowercase words (3+ letters) used in product names: the nouns worth prefetching."""
+    vocab = set()
+    for name in product_names:
+        for word in re.findall(r"[a-z]+", (name or "").lower()):
+            if len(word) > 2 and word not in VOCAB_STOPWORDS:
+                vocab.add(word)
+    return frozenset(vocab)
+
+
+def _singular_forms(word: str) -> List[str]:
+    forms = [word]
+    if word.endswith("oes") and len(word) > 4:
+        forms.append(word[:-2])
+    elif word.endswith("ies") and len(word) > 4:
+        forms.append(word[:-3] + "y")
+    elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        forms.append(word[:-1])
+    return forms
+
+
+def candidate_nouns(message: str, vocabulary: FrozenSet[str], max_nouns: int = 3) -> List[str]:
+    """Likely product names in `message`: runs of adjacent catalog words ("amul butter"),
+    longest first, followed by their single words (the LLM often keeps just one)."""
+    if not vocabulary:
+        return []
+    words = []
+    for word in re.findall(r"[a-z]+", (message or "").lower()):
+        known = next((f for f in _singular_forms(word) if f in vocabulary), None)
+        words.append(known)
+
+    phrases, run = [], []
+    for w in words + [None]:
+        if w is None:
+            if run:
+                phrases.append(" ".join(run))
+            run = []
+        else:
+            run.append(w)
+    phrases.sort(key=len, reverse=True)
+    nouns = []
+    for phrase in phrases + [w for p in phrases if " " in p for w in p.split()]:
+        if phrase not in nouns:
+            nouns.append(phrase)
+    return nouns[:max_nouns]
+
+
+class PrefetchStats:
+    def __init__(self):
+        self.started = 0
+        self.used = 0
+        self.wasted = 0
+        self._lock = threading.Lock()
+
+    def record(self, started: bool = False, used: bool = False, wasted: bool = False):
+        with self._lock:
+            self.started += int(started)
+            self.used += int(used)
+            self.wasted += int(wasted)
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "used": self.used,
+            "wasted": self.wasted,
+            "use_rate": round(self.used / self.started, 4) if self.started else 0.0,
+        }
+
+
+prefetch_stats = PrefetchStats()
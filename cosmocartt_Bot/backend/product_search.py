@@ -0,0 +1,143 @@
+"""
+Ranked full-text search for `/products?search=`.
+
+`ilike '%k%'` can't use a B-tree (leading wildcard), so every search was a sequential
+scan, and hits came back in insertion order. Instead:
+
+- Postgres: a generated `search_vector tsvector` column over product (weight A), brand (B),
+  category and sub_category (C) with a GIN index; matched with `@@ to_tsquery` and ordered
+  by `ts_rank`
+- SQLite (local runs): an external-content FTS5 table `products_v2_fts` kept in sync by
+  triggers; matched with `MATCH` and ordered by `bm25`
+
+Each keyword is a prefix term ("shamp" finds shampoo) and keywords are ORed, like the
+ilike path; the english / porter stemmers fold plurals ("tomatoes"). Only product and
+brand words select rows (`MATCH_WEIGHTS`, `MATCH_COLUMNS`): category words are indexed
+for ranking, but "tomato" must not match every other product in Fruits & Vegetables,
+which an explicit `sort=` would then list first. Both structures are
+created with the table on fresh databases and by `scripts/migrate_product_search.py` on
+existing ones. Until they exist, `ProductSearch` keeps the ilike path, re-checking every
+`recheck_seconds`.
+"""
+
+from typing import List, Optional
+import re
+import time
+import threading
+
+from sqlalchemy import DDL, Float, Integer, event, func, literal_column, or_, text
+from sqlalchemy.orm import Query, Session
+import models
+
+TS_CONFIG = "english"
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(product, '')), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(brand, '')), 'B') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(category, '') || ' ' || coalesce(sub_category, '')), 'C')"
+)
+FTS_COLUMNS = ("product", "brand", "category", "sub_category")
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 1.0)
+# What a keyword has to hit for a row to match: the product and brand weights / columns
+MATCH_WEIGHTS = "AB"
+MATCH_COLUMNS = ("product", "brand")
+
+
+def postgres_ddl(concurrently: bool = False) -> List[str]:
+    return [
+        f"ALTER TABLE products_v2 ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED",
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS ix_products_v2_search_vector "
+        f"ON products_v2 USING gin (search_vector)",
+    ]
+
+
+def sqlite_ddl() -> List[str]:
+    cols = ", ".join(FTS_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    delete = f"INSERT INTO products_v2_fts(products_v2_fts, rowid, {cols}) VALUES ('delete', old.\"index\", {old});"
+    insert = f"INSERT INTO products_v2_fts(rowid, {cols}) VALUES (new.\"index\", {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS products_v2_fts USING fts5({cols}, "
+        f"content='products_v2', content_rowid='index', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS products_v2_fts_ai AFTER INSERT ON products_v2 BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS products_v2_fts_ad AFTER DELETE ON products_v2 BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS products_v2_fts_au AFTER UPDATE ON products_v2 BEGIN {delete} {insert} END",
+    ]
+
+
+# Fresh tables get the search structures right away (existing ones: the migration script)
+for _sql in postgres_ddl():
+    event.listen(models.Product.__table__, "after_create", DDL(_sql).execute_if(dialect="postgresql"))
+for _sql in sqlite_ddl():
+    event.listen(models.Product.__table__, "after_create", DDL(_sql).execute_if(dialect="sqlite"))
+
+
+def _terms(keywords: List[str]) -> List[str]:
+    return list(dict.fromkeys(t for k in keywords for t in re.findall(r"[a-z0-9]+", k.lower())))
+
+
+class ProductSearch:
+    def __init__(self, recheck_seconds: float = 60):
+        self.recheck_seconds = recheck_seconds
+        self._mode: Optional[str] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.searches = {"postgres": 0, "sqlite": 0, "ilike": 0}
+
+    def mode(self, db: Session) -> Optional[str]:
+        """"postgres" / "sqlite" when the full-text structures exist, else None (ilike)."""
+        if self._mode is not None or time.monotonic() - self._checked_at < self.recheck_seconds:
+            return self._mode
+        with self._lock:
+            if self._mode is None and time.monotonic() - self._checked_at >= self.recheck_seconds:
+                self._checked_at = time.monotonic()
+                self._mode = self._detect(db)
+        return self._mode
+
+    @staticmethod
+    def _detect(db: Session) -> Optional[str]:
+        dialect = db.get_bind().dialect.name
+        try:
+            if dialect == "postgresql":
+                found = db.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'products_v2' AND column_name = 'search_vector'")).first()
+                return "postgres" if found else None
+            if dialect == "sqlite":
+                found = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'products_v2_fts'")).first()
+                return "sqlite" if found else None
+        except Exception as e:
+            print(f"Full-text search check failed, using ilike: {e}")
+            db.rollback()
+        return None
+
+    def apply(self, query: Query, db: Session, keywords: List[str], fts: Optional[bool] = None, ranked: bool = True) -> Query:
+        """`query` narrowed to products matching any keyword, best match first.
+        `ranked=False` only filters (grouped facet counts); `fts=False` forces the ilike
+        path (benchmarks)."""
+        mode = self.mode(db) if fts is not False else None
+        terms = _terms(keywords)
+        if mode == "postgres" and terms:
+            self.searches["postgres"] += 1
+            tsquery = func.to_tsquery(TS_CONFIG, " | ".join(f"{t}:*" for t in terms))
+            matching = func.to_tsquery(TS_CONFIG, " | ".join(f"{t}:*{MATCH_WEIGHTS}" for t in terms))
+            vector = literal_column("products_v2.search_vector")
+            query = query.filter(vector.op("@@")(matching))
+            return query.order_by(func.ts_rank(vector, tsquery).desc(), models.Product.index) if ranked else query
+        if mode == "sqlite" and terms:
+            self.searches["sqlite"] += 1
+            weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+            match = "{%s} : (%s)" % (" ".join(MATCH_COLUMNS), " OR ".join(f'"{t}"*' for t in terms))
+            hits = text(
+                f"SELECT rowid AS id, bm25(products_v2_fts, {weights}) AS rank "
+                f"FROM products_v2_fts WHERE products_v2_fts MATCH :match"
+            ).bindparams(match=match).columns(id=Integer, rank=Float).subquery()
+            query = query.join(hits, models.Product.index == hits.c.id)
+            return query.order_by(hits.c.rank, models.Product.index) if ranked else query
+        self.searches["ilike"] += 1
+        query = query.filter(or_(*[models.Product.product.ilike(f"%{k}%") for k in keywords]))
+        return query.order_by(models.Product.index) if ranked else query
+
+    def stats(self) -> dict:
+        return {"mode": self._mode or "ilike", "searches": dict(self.searches)}
@@ -0,0 +1,41 @@
+"""
+Column projections for product responses.
+
+List views only show a name, price, image and veg mark, yet every column was loaded and
+sent, descriptions and dates included. Endpoints accept `fields=` (comma separated
+schemas.Product field names, or a preset such as `compact`) and select only those
+columns. `index` is always included so clients can address the row.
+"""
+
+from typing import List, Optional
+
+import models
+import schemas
+
+PRODUCT_FIELDS = list(schemas.Product.model_fields)
+
+PRESETS = {
+    "compact": ["index", "product", "sale_price", "market_price", "image_url", "is_veg"],
+}
+
+
+def parse_fields(spec: Optional[str]) -> List[str]:
+    """Field names for a `fields=` value, in schema order; every field when empty.
+    Raises ValueError on unknown names."""
+    if not spec or not spec.strip():
+        return list(PRODUCT_FIELDS)
+    wanted = {"index"}
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        if name in PRESETS:
+            wanted.update(PRESETS[name])
+        elif name in PRODUCT_FIELDS:
+            wanted.add(name)
+        else:
+            raise ValueError(f"unknown field '{name}'; use {', '.join(PRODUCT_FIELDS)} or {', '.join(PRESETS)}")
+    return [f for f in PRODUCT_FIELDS if f in wanted]
+
+
+def columns(fields: List[str]):
+    return [getattr(models.Product, f) for f in fields]
@@ -61,6 +61,29 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductFields(BaseModel):
+    """A `Product` cut to the requested `fields=`: only `index` is always present."""
+    index: int
+    product: Optional[str] = None
+    category: Optional[str] = None
+    sub_category: Optional[str] = None
+    brand: Optional[str] = None
+    sale_price: Optional[float] = None
+    market_price: Optional[float] = None
+    type: Optional[str] = None
+    rating: Optional[float] = None
+    description: Optional[str] = None
+    weight_str: Optional[str] = None
+    unit_type: Optional[str] = None
+    is_veg: Optional[bool] = None
+    image_url: Optional[str] = None
+    packed_date: Optional[str] = None
+    expiry_date: Optional[str] = None
+    stock: Optional[int] = None
+
+class ProductIds(BaseModel):
+    ids: List[int]
+
 class UserBase(BaseModel):
     mobile_number: str
     name: str
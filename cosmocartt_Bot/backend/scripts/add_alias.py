@@ -0,0 +1,50 @@
+"""
+Add (or update) a learned search alias in the product_aliases table.
+
+Running servers pick it up on their next alias check (ALIASES_RELOAD_SECONDS), no restart.
+
+Usage (from backend/):
+    python scripts/add_alias.py dahi curd
+    python scripts/add_alias.py sabzi "Fruits & Vegetables" --kind category
+    python scripts/add_alias.py --list
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import models  # noqa: E402
+from synonyms import AliasMatcher, KINDS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("alias", nargs="?")
+    parser.add_argument("canonical", nargs="?")
+    parser.add_argument("--kind", default="product", choices=KINDS)
+    parser.add_argument("--list", action="store_true", help="show learned aliases")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine, tables=[models.ProductAlias.__table__])
+    db = database.SessionLocal()
+    try:
+        if args.list:
+            rows = db.query(models.ProductAlias).order_by(models.ProductAlias.kind, models.ProductAlias.alias).all()
+            print(f"{len(rows)} learned aliases")
+            for r in rows:
+                print(f"  [{r.kind}] {r.alias} -> {r.canonical}")
+            return
+        if not args.alias or not args.canonical:
+            parser.error("alias and canonical are required")
+        matcher = AliasMatcher(path=None)
+        matcher.learn(db, args.alias, args.canonical, args.kind)
+        print(f"Added [{args.kind}] {args.alias.strip().lower()} -> {args.canonical.strip()}")
+        print(f"Check: '{args.alias}' normalizes to '{matcher.normalize(args.alias, kinds=KINDS)}'")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark the catalog response path on a 500-product page: the old `response_model`
+route (pydantic validation per row + stdlib JSON) against pre-shaped rows through
+`FastJSONResponse` (orjson when installed), and the bytes on the wire per encoding.
+
+Both routes run in a throwaway FastAPI app through TestClient, so transport overhead is
+the same on each side; the serialization-only timings isolate the encoder.
+
+Usage (from backend/):
+    python scripts/benchmark_responses.py [--rows 500] [-n 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+import schemas  # noqa: E402
+import fast_response  # noqa: E402
+from fast_response import CompressionMiddleware, FastJSONResponse, compress, dumps  # noqa: E402
+
+
+def synthetic_rows(n: int):
+    rng = random.Random(3)
+    words = ["Organic", "Fresh", "Premium", "Classic", "Masala", "Basmati", "Toor", "Dal", "Atta", "Milk",
+             "Butter", "Paneer", "Biscuits", "Noodles", "Shampoo", "Soap", "Green", "Tea", "Coffee", "Ghee"]
+    rows = []
+    for i in range(n):
+        name = " ".join(rng.sample(words, rng.randint(2, 4)))
+        price = round(rng.uniform(10, 900), 2)
+        rows.append({
+            "index": i + 1, "product": name, "category": "Foodgrains, Oil & Masala", "sub_category": "Dals & Pulses",
+            "brand": rng.choice(["Tata Sampann", "Aashirvaad", "Fortune", "24 Mantra"]),
+            "sale_price": price, "market_price": round(price * rng.uniform(1, 1.3), 2), "type": "General",
+            "rating": round(rng.uniform(3, 5), 1), "description": f"{name} - carefully sourced, hygienically packed.",
+            "weight_str": rng.choice(["500 g", "1 kg", "5 kg"]), "unit_type": "pcs", "is_veg": True,
+            "image_url": f"https://www.bigbasket.com/media/uploads/p/l/{40000000 + i}_1-product.jpg",
+            "packed_date": "2024-01-10", "expiry_date": "2024-07-10", "stock": rng.randint(0, 200),
+        })
+    return rows
+
+
+def timed(fn, n: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("-n", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    objects = [SimpleNamespace(**r) for r in rows]
+    print(f"{args.rows} products, orjson {'on' if fast_response.orjson else 'off'}, "
+          f"brotli {'on' if fast_response.brotli else 'off'}")
+
+    print("\nSerialization only (ms/page):")
+    old = timed(lambda: json.dumps(jsonable_encoder([schemas.Product.model_validate(o) for o in objects])), args.n)
+    new = timed(lambda: dumps(rows), args.n)
+    print(f"  validate + jsonable_encoder + json.dumps  {old:8.3f}")
+    print(f"  pre-shaped rows + dumps                   {new:8.3f}  ({old / new:.0f}x)")
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/old", response_model=List[schemas.Product])
+    def old_route():
+        return [schemas.Product.model_validate(o) for o in objects]
+
+    @app.get("/new")
+    def new_route():
+        return FastJSONResponse(rows)
+
+    print("\nEnd to end through TestClient, identity encoding (ms/request):")
+    with TestClient(app) as client:
+        identity = {"Accept-Encoding": "identity"}
+        old = timed(lambda: client.get("/old", headers=identity), args.n)
+        new = timed(lambda: client.get("/new", headers=identity), args.n)
+        print(f"  response_model route   {old:8.3f}")
+        print(f"  FastJSONResponse route {new:8.3f}  ({old / new:.1f}x)")
+        gz = timed(lambda: client.get("/new", headers={"Accept-Encoding": "gzip"}), args.n)
+        print(f"  FastJSONResponse + gzip {gz:7.3f}")
+        if fast_response.brotli:
+            br = timed(lambda: client.get("/new", headers={"Accept-Encoding": "br"}), args.n)
+            print(f"  FastJSONResponse + br   {br:7.3f}")
+
+    body = dumps(rows)
+    print("\nBytes on the wire:")
+    print(f"  identity {len(body):9,d}")
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and not fast_response.brotli:
+            print("  br       (pip install brotli)")
+            continue
+        start = time.perf_counter()
+        size = len(compress(body, encoding))
+        print(f"  {encoding:<8} {size:9,d}  ({size / len(body):.0%}, {(time.perf_counter() - start) * 1000:.2f} ms to compress)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark `/products?search=` backends: the ilike scan against full-text search
+(tsvector + GIN on Postgres, FTS5 on SQLite), on a generated catalog.
+
+The catalog is written to a scratch database: a temporary SQLite file by default, or the
+(empty) database given with --url, e.g. a throwaway Postgres. It refuses to touch a
+products_v2 table that already has rows.
+
+Usage (from backend/):
+    python scripts/benchmark_search.py --rows 100000
+    python scripts/benchmark_search.py --url postgresql://localhost/bench --rows 200000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = {
+    "Fruits & Vegetables": ["Fresh Vegetables", "Fresh Fruits", "Herbs & Seasonings"],
+    "Bakery, Cakes & Dairy": ["Dairy", "Breads & Buns", "Cakes & Pastries"],
+    "Beverages": ["Tea", "Coffee", "Energy & Soft Drinks"],
+    "Beauty & Hygiene": ["Hair Care", "Bath & Hand Wash", "Oral Care"],
+    "Snacks & Branded Foods": ["Biscuits & Cookies", "Chips & Crisps", "Noodles & Pasta"],
+}
+
+
+def synthetic_rows(n: int):
+    rng = random.Random(7)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))) for _ in range(5000)]
+    brands = [w.title() for w in rng.sample(words, 400)]
+    for _ in range(n):
+        category = rng.choice(list(CATEGORIES))
+        yield {
+            "product": " ".join(rng.choice(words) for _ in range(rng.randint(2, 5))).title(),
+            "brand": rng.choice(brands),
+            "category": category,
+            "sub_category": rng.choice(CATEGORIES[category]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("-n", "--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50, help="page size, as the frontend requests")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy import create_engine, func, insert, text
+    from sqlalchemy.orm import Session
+    import models
+    from product_search import ProductSearch
+
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine, tables=[models.Product.__table__])
+    db = Session(bind=engine)
+    if db.query(func.count(models.Product.index)).scalar():
+        print("ERROR: products_v2 in the scratch database is not empty")
+        sys.exit(1)
+
+    print(f"Writing {args.rows} products to {engine.url.render_as_string(hide_password=True)}")
+    start = time.perf_counter()
+    batch = []
+    for row in synthetic_rows(args.rows):
+        batch.append(row)
+        if len(batch) == 10000:
+            db.execute(insert(models.Product), batch)
+            batch = []
+    if batch:
+        db.execute(insert(models.Product), batch)
+    db.commit()
+    db.execute(text("ANALYZE products_v2"))
+    db.commit()
+    print(f"  {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(42)
+    names = [r[0] for r in db.query(models.Product.product).limit(5000)]
+    queries = []
+    for _ in range(args.queries):
+        words = rng.choice(names).lower().split()
+        queries.append(rng.sample(words, min(len(words), rng.choice((1, 1, 2)))))
+
+    search = ProductSearch()
+    mode = search.mode(db)
+    if mode is None:
+        print("ERROR: full-text structures missing; they are created with the table")
+        sys.exit(1)
+
+    results = {}
+    for label, fts in (("ilike", False), (mode, True)):
+        for keywords in queries[:5]:  # warm caches
+            search.apply(db.query(models.Product.index), db, keywords, fts=fts).limit(args.limit).all()
+        start = time.perf_counter()
+        hits = [[r[0] for r in search.apply(db.query(models.Product.index), db, keywords, fts=fts).limit(args.limit)]
+                for keywords in queries]
+        elapsed = time.perf_counter() - start
+        results[label] = hits
+        print(f"[{label}] {elapsed / len(queries) * 1000:.2f} ms/query, "
+              f"{sum(map(len, hits)) / len(hits):.1f} rows/query")
+
+    ilike, fts = results["ilike"], results[mode]
+    # ilike pages come back in insertion order, so compare hit/miss rather than the rows
+    agree = sum(bool(a) == bool(b) for a, b in zip(ilike, fts)) / len(queries)
+    print(f"Both found something (or nothing) for {agree:.0%} of queries")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare product-name similarity engines: the reference `utils.similarity`
+(SequenceMatcher, one Python call per pair) against the vectorized `TfidfIndex`.
+
+Queries are catalog names with a typo or a dropped word, so each one has a known
+intended product. For each engine the script reports latency per query, recall@k of
+the intended product, and how often its top hit agrees with the reference.
+
+Usage (from backend/):
+    python scripts/benchmark_similarity.py                  # names from DATABASE_URL
+    python scripts/benchmark_similarity.py --synthetic 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import find_similar_products  # noqa: E402
+from tfidf_index import TfidfIndex  # noqa: E402
+
+
+def load_names(limit: int):
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine, text
+
+    load_dotenv()
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        print("ERROR: DATABASE_URL not found in .env (or use --synthetic N)")
+        sys.exit(1)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(text('SELECT "index", product FROM products_v2 WHERE product IS NOT NULL LIMIT :n'), {"n": limit})
+        return [(r[0], r[1]) for r in rows]
+
+
+def synthetic_names(n: int):
+    rng = random.Random(7)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    return [(i, " ".join(rng.choice(words) for _ in range(rng.randint(2, 5))).title()) for i in range(n)]
+
+
+def corrupt(name: str, rng: random.Random) -> str:
+    words = name.lower().split()
+    if len(words) > 2 and rng.random() < 0.5:
+        words.pop(rng.randrange(len(words)))
+    w = rng.randrange(len(words))
+    if len(words[w]) > 3:
+        i = rng.randrange(len(words[w]))
+        words[w] = words[w][:i] + words[w][i + 1:]
+    return " ".join(words)
+
+
+def run(rows, n_queries: int, k: int):
+    rng = random.Random(42)
+    picks = [rows[rng.randrange(len(rows))] for _ in range(n_queries)]
+    queries = [(pid, corrupt(name, rng)) for pid, name in picks]
+    names = [name for _, name in rows]
+    id_of = {name: pid for pid, name in rows}
+    print(f"Catalog: {len(rows)} names, {len(queries)} queries, k={k}")
+
+    print("\n[reference] utils.similarity (SequenceMatcher)")
+    start = time.perf_counter()
+    reference = [[id_of[n] for n, _ in find_similar_products(q, names, limit=k)] for _, q in queries]
+    ref_time = time.perf_counter() - start
+    ref_recall = sum(pid in top for (pid, _), top in zip(queries, reference)) / len(queries)
+    print(f"  {ref_time / len(queries) * 1000:.2f} ms/query, recall@{k} {ref_recall:.3f}")
+
+    if not TfidfIndex.available:
+        print("\nnumpy/scipy not installed: skipping TF-IDF")
+        return
+
+    print("\n[tfidf] TfidfIndex")
+    start = time.perf_counter()
+    index = TfidfIndex(rows)
+    print(f"  build {time.perf_counter() - start:.2f} s, {index.stats()}")
+
+    start = time.perf_counter()
+    single = [[pid for _, _, pid in index.top_k(q, k)] for _, q in queries]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = [[pid for _, _, pid in hits] for hits in index.top_k_batch([q for _, q in queries], k)]
+    batch_time = time.perf_counter() - start
+
+    recall = sum(pid in top for (pid, _), top in zip(queries, single)) / len(queries)
+    agree = sum(bool(a) and bool(b) and a[0] == b[0] for a, b in zip(single, reference)) / len(queries)
+    print(f"  {single_time / len(queries) * 1000:.3f} ms/query (top_k), "
+          f"{batch_time / len(queries) * 1000:.3f} ms/query (top_k_batch)")
+    print(f"  recall@{k} {recall:.3f}, top-1 agreement with reference {agree:.3f}")
+    print(f"  speedup vs reference: {ref_time / single_time:.0f}x single, {ref_time / batch_time:.0f}x batch")
+    if batch != single:
+        print("  WARNING: batch and single results differ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=0, help="use N generated names instead of the DB")
+    parser.add_argument("--limit", type=int, default=100000, help="max catalog rows to load")
+    parser.add_argument("-n", "--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_names(args.synthetic) if args.synthetic else load_names(args.limit)
+    run(rows, args.queries, args.k)
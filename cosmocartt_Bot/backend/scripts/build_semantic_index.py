@@ -0,0 +1,64 @@
+"""
+Build the local semantic product index (see semantic_index.py) from products_v2.
+
+Run after importing products; the API memory-maps the result at startup. Workers
+already running keep the previous index until they restart.
+
+Usage (from backend/):
+    python scripts/build_semantic_index.py [--out semantic_index] [--query "something for breakfast"]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import models  # noqa: E402
+from catalog_version import get_catalog_version  # noqa: E402
+from semantic_index import SemanticIndex  # noqa: E402
+
+DEFAULT_OUT = os.getenv("SEMANTIC_INDEX_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "semantic_index"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--nlist", type=int, default=None, help="clusters (default 2*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, default=None, help="clusters scanned per query (default nlist/8)")
+    parser.add_argument("--query", action="append", default=[], help="sample query to try after building")
+    args = parser.parse_args()
+
+    if not SemanticIndex.available:
+        print("ERROR: numpy is required to build the semantic index")
+        sys.exit(1)
+
+    db = database.SessionLocal()
+    try:
+        version = get_catalog_version(db, force=True)
+        cols = (models.Product.index, models.Product.product, models.Product.brand, models.Product.category,
+                models.Product.sub_category, models.Product.description)
+        rows = [r._asdict() for r in db.query(*cols).yield_per(5000)]
+    finally:
+        db.close()
+    print(f"Loaded {len(rows)} products (catalog version {version})")
+
+    start = time.perf_counter()
+    index = SemanticIndex.build(rows, dim=args.dim, nlist=args.nlist, nprobe=args.nprobe, catalog_version=version)
+    print(f"Built in {time.perf_counter() - start:.1f}s: {index.stats()}")
+    index.save(args.out)
+    print(f"Saved to {args.out}")
+
+    if args.query:
+        loaded = SemanticIndex.load(args.out)
+        names = {r["index"]: r["product"] for r in rows}
+        for q in args.query:
+            print(f"\n'{q}':")
+            for pid, score in loaded.search(q, k=5):
+                print(f"  {score:.3f}  {names.get(pid)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from backend.database import SessionLocal, engine
 from backend.models import Product
 from sqlalchemy import text
+from backend.catalog_version import bump_catalog_version
 
 # Mapping of Sub-Categories to high-quality Open Source Image URLs (Unsplash/Pexels/Wikimedia)
 # Using generic but relevant images.
@@ -186,6 +187,8 @@ def update_images():
 
         db.commit()
         print("Successfully updated ALL product images!")
+        # Running API workers drop their cached catalog data
+        print(f"Catalog version is now {bump_catalog_version(db)}")
         
     except Exception as e:
         print(f"Error: {e}")
@@ -4,10 +4,12 @@ import os
 import sys
 import traceback
 import re
+from sqlalchemy.orm import Session
 
 # No path hacking needed when running as module
 from backend.database import DATABASE_URL
 from backend.models import Product, Base
+from backend.catalog_version import bump_catalog_version
 
 def import_data():
     if not DATABASE_URL:
@@ -95,6 +97,9 @@ def import_data():
         print("Inserting records...")
         df.to_sql('products_v2', engine, if_exists='append', index=False, chunksize=1000)
         print("Data imported successfully!")
+        # Running API workers drop their cached catalog data
+        with Session(engine) as db:
+            print(f"Catalog version is now {bump_catalog_version(db)}")
     except Exception as e:
         import traceback
         with open("conversion_error.txt", "w") as f:
@@ -5,6 +5,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from backend.catalog_version import bump_catalog_version
+
 # 1. Setup Database Connection (Standalone)
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -103,6 +105,8 @@ def migrate():
                 db.commit()
         
         print(f"--- SUCCESS: {count} PRODUCTS IMPORTED ---")
+        # Running API workers drop their cached catalog data
+        print(f"Catalog version is now {bump_catalog_version(db)}")
         
     except Exception as e:
         print(f"CRITICAL ERROR: {e}")
@@ -0,0 +1,75 @@
+"""
+Create the product-name lookup indexes on an existing database.
+
+`models.Base.metadata.create_all` only adds indexes for tables it creates, so a
+`products_v2` table that already exists needs this once:
+
+- Postgres: the `pg_trgm` extension, a B-tree on lower(product) (exact / prefix lookups)
+  and a GIN trigram index on lower(product) (LIKE '%name%'), built CONCURRENTLY so the
+  table stays writable
+- SQLite: the lower(product) expression index (SQLite has no trigram index; substring
+  lookups stay a scan there)
+- both: (category, index), (category, sub_category, index) and the sort=name / sort=price
+  variants (category, sort key, index) for keyset-paginated listings
+
+Safe to re-run. Usage (from backend/):
+    python scripts/migrate_product_indexes.py
+"""
+import os
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    print("ERROR: DATABASE_URL not found in .env")
+    exit(1)
+
+POSTGRES_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_product_lower ON products_v2 (lower(product))",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_product_trgm ON products_v2 USING gin (lower(product) gin_trgm_ops)",
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_category_index ON products_v2 (category, "index")',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_category_sub_index ON products_v2 (category, sub_category, "index")',
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_category_name_index ON products_v2 (category, coalesce(product, ''), \"index\")",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_v2_category_price_index ON products_v2 (category, coalesce(sale_price, 0.0), \"index\")",
+    "ANALYZE products_v2",
+]
+
+SQLITE_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_products_v2_product_lower ON products_v2 (lower(product))",
+    'CREATE INDEX IF NOT EXISTS ix_products_v2_category_index ON products_v2 (category, "index")',
+    'CREATE INDEX IF NOT EXISTS ix_products_v2_category_sub_index ON products_v2 (category, sub_category, "index")',
+    "CREATE INDEX IF NOT EXISTS ix_products_v2_category_name_index ON products_v2 (category, coalesce(product, ''), \"index\")",
+    "CREATE INDEX IF NOT EXISTS ix_products_v2_category_price_index ON products_v2 (category, coalesce(sale_price, 0.0), \"index\")",
+    "ANALYZE products_v2",
+]
+
+
+def migrate():
+    engine = create_engine(DATABASE_URL)
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        statements = POSTGRES_STATEMENTS
+    elif dialect == "sqlite":
+        statements = SQLITE_STATEMENTS
+    else:
+        print(f"Unsupported database: {dialect}")
+        return
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for sql in statements:
+            print(f"-> {sql}")
+            try:
+                conn.execute(text(sql))
+            except Exception as e:
+                print(f"   FAILED: {e}")
+                if "pg_trgm" in sql:
+                    print("   The trigram index needs pg_trgm; ask the DB owner to install it.")
+                    break
+    print("Done.")
+
+
+if __name__ == "__main__":
+    migrate()
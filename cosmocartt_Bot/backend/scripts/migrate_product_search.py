@@ -0,0 +1,53 @@
+"""
+Add the full-text search structures (see product_search.py) to an existing products_v2.
+
+- Postgres: the generated `search_vector` tsvector column (adding it rewrites the table
+  under an exclusive lock, so run it off-peak) and its GIN index, built CONCURRENTLY
+- SQLite: the `products_v2_fts` FTS5 table and its sync triggers, then a full rebuild
+
+Running servers switch from ilike within a minute. Safe to re-run.
+
+Usage (from backend/):
+    python scripts/migrate_product_search.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+import database  # noqa: E402
+from product_search import postgres_ddl, sqlite_ddl  # noqa: E402
+
+
+def migrate():
+    engine = database.engine
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        statements = postgres_ddl(concurrently=True) + ["ANALYZE products_v2"]
+    elif dialect == "sqlite":
+        statements = sqlite_ddl() + [
+            "INSERT INTO products_v2_fts(products_v2_fts) VALUES ('rebuild')",
+            "INSERT INTO products_v2_fts(products_v2_fts) VALUES ('optimize')",
+        ]
+    else:
+        print(f"Unsupported database: {dialect}")
+        return
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for sql in statements:
+            print(f"-> {sql[:100]}{'...' if len(sql) > 100 else ''}")
+            start = time.perf_counter()
+            try:
+                conn.execute(text(sql))
+            except Exception as e:
+                print(f"   FAILED: {e}")
+                return
+            print(f"   {time.perf_counter() - start:.1f}s")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,75 @@
+"""
+Local mock of an OpenAI-compatible /chat/completions endpoint for exercising the chat
+pipeline without Groq.
+
+Usage:
+    python backend/scripts/mock_llm_server.py --port 9100 --latency 1.5
+
+Then point the backend at it:
+    GROQ_API_URL=http://127.0.0.1:9100/v1 GROQ_API_KEY=mock
+"""
+import argparse
+import asyncio
+import json
+import re
+
+from fastapi import FastAPI, Request
+import uvicorn
+
+app = FastAPI()
+LATENCY_SECONDS = 1.0
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def fake_intent(user_message: str) -> dict:
+    msg = user_message.lower()
+    intent = {
+        "query_type": "PRODUCT_SEARCH", "action": "search_product", "product_name": None,
+        "brand": None, "quantity": None, "category": None, "weight": None,
+        "min_price": None, "max_price": None, "confidence": 0.8,
+    }
+    m = re.search(r"add\s+(\d+)\s+(.+)", msg)
+    if m:
+        intent.update(query_type="CART_ADD", action="add_to_cart", quantity=int(m.group(1)), product_name=m.group(2).strip())
+    elif "checkout" in msg:
+        intent.update(query_type="CHECKOUT", action="initiate_checkout")
+    else:
+        words = [w for w in re.findall(r"[a-z]+", msg) if w not in {"show", "me", "some", "the", "i", "want", "please", "for", "any", "got", "today", "looking", "love", "d"}]
+        intent["product_name"] = words[0] if words else None
+    return intent
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = body["messages"][-1]["content"]
+    m = re.search(r"User Message:\s*(.*)", prompt)
+    user_message = m.group(1).strip() if m else prompt
+
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(LATENCY_SECONDS)
+    finally:
+        stats["in_flight"] -= 1
+
+    return {
+        "id": "mock", "object": "chat.completion", "model": body.get("model"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": json.dumps(fake_intent(user_message))}}],
+    }
+
+
+@app.get("/stats")
+def read_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated model latency in seconds")
+    args = parser.parse_args()
+    LATENCY_SECONDS = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -2,6 +2,7 @@ from backend.database import SessionLocal
 from backend.models import Product
 from sqlalchemy import text
 import random
+from backend.catalog_version import bump_catalog_version
 
 def populate_data():
     db = SessionLocal()
@@ -29,6 +30,8 @@ def populate_data():
             
         db.commit()
         print("Prices fixed.")
+        # Running API workers drop their cached catalog data
+        print(f"Catalog version is now {bump_catalog_version(db)}")
 
     except Exception as e:
         print(f"Error: {e}")
@@ -5,6 +5,8 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from backend.catalog_version import bump_catalog_version
+
 # Load env vars
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(env_path)
@@ -52,6 +54,8 @@ def restore_images():
             db.commit()
             
             print("--- RESTORATION COMPLETE ---")
+            # Running API workers drop their cached catalog data
+            print(f"Catalog version is now {bump_catalog_version(db)}")
             print(f"Total rows in CSV: {len(rows_to_update)}")
             # rowcount might not be accurate for executemany in some drivers, but let's try
             # print(f"Total database rows updated: {result.rowcount}") 
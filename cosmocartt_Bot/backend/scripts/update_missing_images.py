@@ -1,5 +1,6 @@
 from backend.database import SessionLocal
 from sqlalchemy import text
+from backend.catalog_version import bump_catalog_version
 
 def update_missing_images():
     db = SessionLocal()
@@ -41,6 +42,8 @@ def update_missing_images():
 
         db.commit()
         print("--- UPDATE COMPLETE ---")
+        # Running API workers drop their cached catalog data
+        print(f"Catalog version is now {bump_catalog_version(db)}")
 
     except Exception as e:
         print(f"Error: {e}")
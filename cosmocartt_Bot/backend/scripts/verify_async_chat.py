@@ -0,0 +1,45 @@
+"""
+Fire N concurrent /api/chat requests and report wall time.
+
+With the backend pointed at `mock_llm_server.py` (latency L seconds), a single uvicorn
+worker should finish N concurrent LLM-bound chats in roughly L seconds, not N * L / threads.
+
+Usage:
+    python backend/scripts/verify_async_chat.py --url http://127.0.0.1:8000 -n 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+MESSAGES = ["i'd love some {w} today", "got any {w} for me", "looking for {w} please"]
+WORDS = ["milk", "bread", "rice", "mango", "banana", "butter", "eggs", "shampoo"]
+
+
+async def run(url: str, n: int):
+    limits = httpx.Limits(max_connections=n, max_keepalive_connections=n)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        async def one(i):
+            # Distinct messages so the intent cache doesn't short-circuit the LLM
+            msg = MESSAGES[i % len(MESSAGES)].format(w=WORDS[i % len(WORDS)]) + f" #{i}"
+            t0 = time.perf_counter()
+            r = await client.post("/api/chat", json={"message": msg})
+            return r.status_code, time.perf_counter() - t0
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(n)))
+        wall = time.perf_counter() - start
+
+    ok = sum(1 for code, _ in results if code == 200)
+    latencies = sorted(t for _, t in results)
+    print(f"{ok}/{n} OK in {wall:.2f}s wall")
+    print(f"p50={latencies[len(latencies) // 2]:.2f}s  p99={latencies[int(len(latencies) * 0.99) - 1]:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("-n", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.n))
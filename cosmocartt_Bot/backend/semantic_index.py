@@ -0,0 +1,198 @@
+"""
+Local, CPU-only semantic product index for vague requests ("something for breakfast").
+
+Embedding (no model download, no GPU):
+- each product is featurized from name, brand, category, sub_category and description
+  (field-weighted word unigrams + character 4-grams, hashed into `HASH_DIM` buckets with
+  crc32, sublinear tf x idf)
+- the sparse feature vector is reduced to `dim` dense dimensions by a seeded Gaussian
+  random projection and L2-normalized, so cosine similarity is a dot product
+
+Approximate nearest neighbours: an inverted-file (IVF) index. Spherical k-means splits the
+catalog into `nlist` clusters; vectors are stored sorted by cluster, so a query scores
+its `nprobe` closest centroids and then reads only those clusters' contiguous slices.
+(Vague queries sit at low cosine to everything, where random-hyperplane LSH collides
+poorly; IVF keeps recall there.) Small catalogs are simply scanned.
+
+Persistence: `build` writes .npy arrays and a meta.json to a directory
+(`scripts/build_semantic_index.py`, default `SEMANTIC_INDEX_PATH=backend/semantic_index`);
+`SemanticIndex.load` memory-maps them, so startup is instant and workers share the pages.
+The projection is regenerated from the stored seed. Needs numpy.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import re
+import json
+import math
+import zlib
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+HASH_DIM = 1 << 14
+FIELD_WEIGHTS = (("product", 3.0), ("sub_category", 2.0), ("category", 1.0), ("brand", 1.0), ("description", 1.0))
+DESCRIPTION_CHARS = 400
+STOPWORDS = {
+    "a", "an", "and", "the", "for", "of", "with", "to", "in", "on", "is", "it", "my", "me", "i",
+    "some", "something", "anything", "stuff", "things", "good", "nice", "best", "want", "need",
+    "show", "give", "get", "find", "any", "please", "from", "this", "that", "our", "your", "at",
+}
+EXACT_SCAN_BELOW = 5000
+FORMAT_VERSION = 1
+ARRAYS = ("ids", "vectors", "idf", "centroids", "offsets")
+
+
+def _features(fields: Iterable[Tuple[str, float]]) -> Dict[int, float]:
+    counts: Dict[int, float] = {}
+    for text, weight in fields:
+        for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+            if word in STOPWORDS or len(word) < 2:
+                continue
+            h = zlib.crc32(b"w:" + word.encode()) % HASH_DIM
+            counts[h] = counts.get(h, 0.0) + weight
+            if len(word) > 3:
+                padded = f" {word} "
+                for i in range(len(padded) - 3):
+                    h = zlib.crc32(b"c:" + padded[i:i + 4].encode()) % HASH_DIM
+                    counts[h] = counts.get(h, 0.0) + 0.5 * weight
+    return {h: 1.0 + math.log(c) if c >= 1.0 else c for h, c in counts.items()}
+
+
+def _product_fields(row: dict) -> List[Tuple[str, float]]:
+    fields = []
+    for name, weight in FIELD_WEIGHTS:
+        value = row.get(name) or ""
+        if name == "description":
+            value = value[:DESCRIPTION_CHARS]
+        fields.append((value, weight))
+    return fields
+
+
+class SemanticIndex:
+    available = np is not None
+
+    def __init__(self, ids, vectors, idf, centroids, offsets, meta: dict):
+        self.ids = ids                # product ids, sorted by cluster
+        self.vectors = vectors        # (n, dim) unit vectors, same order
+        self.idf = idf
+        self.centroids = centroids    # (nlist, dim)
+        self.offsets = offsets        # cluster c is rows offsets[c]:offsets[c + 1]
+        self.meta = meta
+        self.dim = meta["dim"]
+        self.nprobe = meta["nprobe"]
+        self.projection = self._projection(meta["seed"], self.dim)
+        self.queries = 0
+
+    # ----- shared math -----
+    @staticmethod
+    def _projection(seed: int, dim: int):
+        rng = np.random.default_rng(seed)
+        return rng.standard_normal((HASH_DIM, dim), dtype=np.float32) / math.sqrt(dim)
+
+    @staticmethod
+    def _embed(features: Sequence[Dict[int, float]], idf, projection):
+        out = np.zeros((len(features), projection.shape[1]), dtype=np.float32)
+        for i, feats in enumerate(features):
+            if not feats:
+                continue
+            cols = np.fromiter(feats.keys(), dtype=np.int64, count=len(feats))
+            weights = np.fromiter(feats.values(), dtype=np.float32, count=len(feats)) * idf[cols]
+            out[i] = weights @ projection[cols]
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+    @staticmethod
+    def _assign(vectors, centroids, chunk: int = 8192):
+        return np.concatenate([np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1)
+                               for i in range(0, len(vectors), chunk)]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def _kmeans(cls, vectors, nlist: int, iterations: int, rng):
+        """Spherical k-means on (a sample of) the unit vectors."""
+        sample = vectors if len(vectors) <= 50 * nlist else vectors[rng.choice(len(vectors), 50 * nlist, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]  # reseed empty clusters
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        return centroids.astype(np.float32)
+
+    # ----- build / persist -----
+    @classmethod
+    def build(cls, rows: Iterable[dict], dim: int = 256, nlist: Optional[int] = None, nprobe: Optional[int] = None,
+              iterations: int = 8, seed: int = 1729, catalog_version: int = 0) -> "SemanticIndex":
+        """`rows`: dicts with index, product, brand, category, sub_category, description."""
+        if np is None:
+            raise RuntimeError("SemanticIndex needs numpy")
+        ids, feats = [], []
+        for row in rows:
+            ids.append(int(row["index"]))
+            feats.append(_features(_product_fields(row)))
+        n = len(ids)
+        df = np.zeros(HASH_DIM, dtype=np.float32)
+        for f in feats:
+            df[list(f.keys())] += 1
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        vectors = cls._embed(feats, idf, cls._projection(seed, dim))
+
+        nlist = max(1, min(n, nlist or int(2 * math.sqrt(n))))
+        nprobe = max(1, min(nlist, nprobe or nlist // 8))
+        rng = np.random.default_rng(seed)
+        centroids = cls._kmeans(vectors, nlist, iterations, rng) if n else np.zeros((1, dim), dtype=np.float32)
+        assign = cls._assign(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+
+        meta = {"format": FORMAT_VERSION, "dim": dim, "nlist": nlist, "nprobe": nprobe, "seed": seed,
+                "products": n, "catalog_version": catalog_version}
+        return cls(np.asarray(ids, dtype=np.int64)[order], vectors[order], idf, centroids, offsets, meta)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SemanticIndex"]:
+        """Memory-map a saved index; None if numpy is missing or nothing was built yet."""
+        if np is None or not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            print(f"Semantic index at {path} has an old format; rebuild it")
+            return None
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS]
+        return cls(*arrays, meta)
+
+    # ----- query -----
+    def search(self, text: str, k: int = 20, min_score: float = 0.1, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Up to `k` (product id, cosine) pairs most similar to `text`, best first."""
+        feats = _features([(text, 1.0)])
+        n = len(self.ids)
+        if not feats or not n:
+            return []
+        self.queries += 1
+        q = self._embed([feats], self.idf, self.projection)[0]
+        if n < EXACT_SCAN_BELOW:
+            rows = np.arange(n)
+        else:
+            probe = nprobe or self.nprobe
+            closest = np.argpartition(-(np.asarray(self.centroids) @ q), probe - 1)[:probe]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in closest])
+        scores = np.asarray(self.vectors[rows]) @ q
+        top = np.argsort(-scores)[:k]
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def stats(self) -> dict:
+        return {"products": int(len(self.ids)), "dim": self.dim, "nlist": self.meta["nlist"], "nprobe": self.nprobe,
+                "catalog_version": self.meta.get("catalog_version"), "queries": self.queries}
@@ -0,0 +1,152 @@
+"""
+Conversation state for follow-up chat turns.
+
+Each user gets one small record: the last parsed intent plus the products the last reply
+showed, kept as compact `[id, name, sale_price]` triples. That is enough to answer
+"add two of those" or "cheaper ones?" from memory instead of re-asking the LLM and
+re-scanning the catalog.
+
+Backends are pluggable:
+- `InProcessSessionBackend` (default): LRU dict with TTL, capped at `max_sessions`
+- `RedisSessionBackend`: shared across workers, used when `SESSION_BACKEND=redis`
+  (needs the `redis` package and `REDIS_URL`)
+
+Other settings: `SESSION_TTL_SECONDS` (default 900), `SESSION_MAX_USERS` (default 10000).
+"""
+
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import os
+import json
+import time
+import threading
+
+try:
+    import redis  # optional shared backend
+except Exception:
+    redis = None
+
+
+class InProcessSessionBackend:
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl_seconds: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisSessionBackend:
+    def __init__(self, url: str, prefix: str = "chat_session:"):
+        if redis is None:
+            raise ValueError("SESSION_BACKEND=redis requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: dict, ttl_seconds: float):
+        self.client.setex(self.prefix + key, int(ttl_seconds), json.dumps(value, separators=(",", ":")))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+def _rows_in(result: Dict[str, Any]) -> List[dict]:
+    """Every product row a chat reply showed, in display order."""
+    rows = []
+    for key in ("product", "suggestion"):
+        if isinstance(result.get(key), dict) and result[key].get("id") is not None:
+            rows.append(result[key])
+    for key in ("products", "similar"):
+        rows.extend(r for r in result.get(key) or [] if r.get("id") is not None)
+    rows.extend(i["product"] for i in result.get("items") or [] if i.get("product"))
+    return rows
+
+
+class SessionStore:
+    def __init__(self, backend=None, ttl_seconds: float = 900, max_results: int = 20):
+        self.backend = backend or InProcessSessionBackend()
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        ttl = float(os.getenv("SESSION_TTL_SECONDS", "900"))
+        if os.getenv("SESSION_BACKEND", "memory").lower() == "redis":
+            try:
+                return cls(RedisSessionBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0")), ttl_seconds=ttl)
+            except Exception as e:
+                print(f"Warning: Redis session backend unavailable ({e}); using in-process sessions")
+        return cls(InProcessSessionBackend(int(os.getenv("SESSION_MAX_USERS", "10000"))), ttl_seconds=ttl)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        try:
+            session = self.backend.get(user_id)
+        except Exception as e:
+            print(f"Session read failed: {e}")
+            session = None
+        if session is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return session
+
+    def remember(self, user_id: str, intent: Optional[dict], result: Dict[str, Any]):
+        """Store the intent and the compact result set of the reply just sent to `user_id`."""
+        if not user_id or not isinstance(result, dict):
+            return
+        products, seen = [], set()
+        for row in _rows_in(result):
+            if row["id"] in seen:
+                continue
+            seen.add(row["id"])
+            products.append([row["id"], row.get("name"), row.get("sale_price")])
+            if len(products) >= self.max_results:
+                break
+        if not products and intent is None:
+            return
+        try:
+            self.backend.set(user_id, {"intent": intent, "products": products, "ts": time.time()}, self.ttl_seconds)
+        except Exception as e:
+            print(f"Session write failed: {e}")
+
+    def forget(self, user_id: str):
+        self.backend.delete(user_id)
+
+    def stats(self) -> dict:
+        stats = {"hits": self.hits, "misses": self.misses, "backend": type(self.backend).__name__}
+        if isinstance(self.backend, InProcessSessionBackend):
+            stats["sessions"] = len(self.backend)
+            stats["evictions"] = self.backend.evictions
+        return stats
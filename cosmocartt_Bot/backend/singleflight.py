@@ -0,0 +1,113 @@
+"""
+Request coalescing ("single-flight").
+
+When many identical requests arrive at once (a promotion sends everyone to "show me
+mangoes"), only the first caller for a key does the work; concurrent callers with the
+same key wait for it and share its result (or its exception). Nothing is cached once
+the call finishes; this only collapses requests that overlap in time.
+
+`SingleFlight` is for blocking code running in threads (sync endpoints, the DB work),
+`AsyncSingleFlight` for coroutines on the event loop (LLM calls).
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import threading
+
+
+class _FlightStats:
+    def __init__(self):
+        self.executions = 0
+        self.collapsed = 0
+
+    def stats(self) -> dict:
+        total = self.executions + self.collapsed
+        return {
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._calls),
+            "collapse_rate": round(self.collapsed / total, 4) if total else 0.0,
+        }
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_FlightStats):
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight(_FlightStats):
+    """The shared call runs as its own task and every caller awaits it through
+    `asyncio.shield`, so a caller that goes away (client disconnect) only cancels its own
+    wait. The task itself is cancelled once nobody is waiting for it any more."""
+
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.executions += 1
+        else:
+            self.collapsed += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finished(self, key: Hashable, call: _AsyncCall):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()  # mark retrieved; waiters (if any) re-raise it themselves
@@ -0,0 +1,140 @@
+"""
+Symmetric-delete ("SymSpell") spelling correction over the catalog vocabulary.
+
+A typo like "tomatoe" or "shampo" matches no `ilike '%k%'` condition, so `/products`
+scanned the whole table and returned nothing. Instead of comparing the typo against every
+catalog word, every word's deletions (up to `max_distance` characters removed from its
+first `prefix_length` letters) are precomputed into one dict. A lookup generates the
+typo's own deletions and intersects: only the handful of words sharing a deletion are
+verified with an edit distance, so a correction takes microseconds whatever the catalog
+size. Ties go to the word used in more product names.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+import re
+
+WORD = re.compile(r"[a-z]+")
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance (transpositions count as one), or `limit + 1`
+    as soon as it is known to exceed `limit`."""
+    # A typo shares most of its letters with the word: only the differing middle needs the DP
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a or not b:
+        return max(len(a), len(b))
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+def _deletes(word: str, distance: int) -> set:
+    out, frontier = {word}, {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+class SpellingIndex:
+    def __init__(self, words: Dict[str, int], max_distance: int = 2, prefix_length: int = 7, min_length: int = 4):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.words = words
+        self._deletes: Dict[str, List[str]] = {}
+        for word in words:
+            for d in _deletes(word[:prefix_length], max_distance):
+                self._deletes.setdefault(d, []).append(word)
+        self.lookups = 0
+        self.corrections = 0
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], **kwargs) -> "SpellingIndex":
+        """Index every word (3+ letters) of `names` weighted by how many names use it."""
+        counts = Counter()
+        for name in names:
+            counts.update(set(w for w in WORD.findall((name or "").lower()) if len(w) >= 3))
+        return cls(dict(counts), **kwargs)
+
+    def _allowed(self, word: str) -> int:
+        # One edit in a 4-letter word is already a different word often enough
+        return 1 if len(word) <= 4 else self.max_distance
+
+    def lookup(self, word: str) -> Optional[str]:
+        """The closest catalog word to `word` (itself if known), or None."""
+        word = word.lower()
+        if word in self.words:
+            return word
+        if len(word) < self.min_length or not word.isalpha():
+            return None
+        self.lookups += 1
+        limit = self._allowed(word)
+        best, best_key = None, None
+        seen = set()
+        level = {word[:self.prefix_length]}
+        for k in range(limit + 1):
+            # Every word within distance k shares a deletion with `word` at level <= k
+            if best_key is not None and best_key[0] < k:
+                break
+            for d in level:
+                for candidate in self._deletes.get(d, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    bound = limit if best_key is None else best_key[0]
+                    if abs(len(candidate) - len(word)) > bound:
+                        continue
+                    distance = edit_distance(word, candidate, bound)
+                    if distance > bound:
+                        continue
+                    key = (distance, -self.words[candidate], candidate)
+                    if best_key is None or key < best_key:
+                        best, best_key = candidate, key
+            level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+        return best
+
+    def correct(self, text: Optional[str]) -> Optional[str]:
+        """`text` with unknown words replaced by their closest catalog word; None when
+        nothing was corrected."""
+        if not text:
+            return None
+        changed = False
+        pieces, last = [], 0
+        lowered = text.lower()
+        for m in WORD.finditer(lowered):
+            fixed = self.lookup(m.group())
+            if fixed and fixed != m.group():
+                pieces.append(lowered[last:m.start()])
+                pieces.append(fixed)
+                last = m.end()
+                changed = True
+        if not changed:
+            return None
+        self.corrections += 1
+        pieces.append(lowered[last:])
+        return "".join(pieces)
+
+    def stats(self) -> dict:
+        return {"words": len(self.words), "deletes": len(self._deletes),
+                "lookups": self.lookups, "corrections": self.corrections}
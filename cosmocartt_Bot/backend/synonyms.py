@@ -0,0 +1,245 @@
+"""
+Alias dictionary for grocery vocabulary ("dahi" -> curd, "bhindi" -> ladies finger).
+
+Customers type Hindi names, spelling variants and brand shorthand that neither `ilike` nor
+fuzzy matching can bridge. Every alias is compiled into one Aho-Corasick automaton, so
+normalizing a message or search string is a single linear pass whatever the dictionary
+size. Matches are whole words only, leftmost-longest ("wheat flour" beats "flour").
+
+Sources, merged (the table wins on conflicts):
+- `aliases.json` next to this module (or `ALIASES_PATH`): curated, grouped by kind
+  (`product`, `brand`, `category`) as {canonical: [aliases...]}
+- the `product_aliases` table: learned aliases, added with `AliasMatcher.learn` or
+  `scripts/add_alias.py`
+
+Hot reload: `maybe_reload(db)` re-checks the file mtime and the table at most every
+`ALIASES_RELOAD_SECONDS` (default 30) and swaps in a new automaton when either changed,
+so edits go live without a restart.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from collections import deque
+import os
+import json
+import time
+import datetime
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import models
+from utils import conjunction_pairs
+from prefetch import build_vocabulary
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aliases.json")
+KINDS = ("product", "brand", "category")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over lowercase text. `patterns` maps alias -> payload."""
+
+    def __init__(self, patterns: Dict[str, object]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        self.payloads = dict(patterns)
+        for pattern in patterns:
+            self._insert(pattern)
+        self._link()
+
+    def _insert(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pattern)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Non-overlapping whole-word matches as (start, end, pattern), leftmost-longest."""
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                start, end = i - len(pattern) + 1, i + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (end == len(text) or not _is_word_char(text[end])):
+                    hits.append((start, end, pattern))
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        chosen, last_end = [], 0
+        for start, end, pattern in hits:
+            if start >= last_end:
+                chosen.append((start, end, pattern))
+                last_end = end
+        return chosen
+
+    def __len__(self):
+        return len(self.payloads)
+
+
+class AliasMatcher:
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, reload_seconds: float = 30):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._automaton = AhoCorasick({})
+        # `utils.conjunction_pairs` of every alias and canonical term
+        self.compounds: FrozenSet[str] = frozenset()
+        # `prefetch.build_vocabulary` of the same terms, so "dahi" counts as a catalog word
+        self.words: FrozenSet[str] = frozenset()
+        self._file_mtime = None
+        self._table_marker = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.rewrites = 0
+        self.load()
+        # The table needs a session: let the first `maybe_reload(db)` read it right away
+        self._checked_at = float("-inf")
+
+    @classmethod
+    def from_env(cls) -> "AliasMatcher":
+        return cls(
+            path=os.getenv("ALIASES_PATH", DEFAULT_PATH),
+            reload_seconds=float(os.getenv("ALIASES_RELOAD_SECONDS", "30")),
+        )
+
+    # ----- loading -----
+    def _read_file(self) -> Dict[str, Tuple[str, str]]:
+        entries = {}
+        if not self.path or not os.path.exists(self.path):
+            return entries
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Could not read aliases file {self.path}: {e}")
+            return entries
+        for kind in KINDS:
+            for canonical, aliases in (data.get(kind) or {}).items():
+                for alias in aliases:
+                    entries[alias.strip().lower()] = (canonical, kind)
+        return entries
+
+    def _file_stamp(self):
+        try:
+            return os.path.getmtime(self.path) if self.path else None
+        except OSError:
+            return None
+
+    @staticmethod
+    def _table_stamp(db: Session):
+        return db.query(func.count(models.ProductAlias.id), func.max(models.ProductAlias.updated_at)).one()
+
+    def load(self, db: Optional[Session] = None):
+        """Rebuild the automaton from the file (and the table, when `db` is given)."""
+        entries = self._read_file()
+        file_mtime = self._file_stamp()
+        table_marker = self._table_marker
+        if db is not None:
+            try:
+                for row in db.query(models.ProductAlias).all():
+                    entries[row.alias.strip().lower()] = (row.canonical, row.kind or "product")
+                table_marker = tuple(self._table_stamp(db))
+            except Exception as e:
+                print(f"Could not read product_aliases: {e}")
+                db.rollback()
+        automaton = AhoCorasick({a: v for a, v in entries.items() if a and a != v[0].lower()})
+        terms = list(entries) + [canonical for canonical, _ in entries.values()]
+        compounds = conjunction_pairs(terms)
+        words = build_vocabulary(terms)
+        with self._lock:
+            self._automaton = automaton
+            self.compounds = compounds
+            self.words = words
+            self._file_mtime = file_mtime
+            self._table_marker = table_marker
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+
+    def maybe_reload(self, db: Optional[Session] = None, force: bool = False):
+        """Reload if the file or table changed; checked at most every `reload_seconds`."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        changed = self._file_stamp() != self._file_mtime
+        if db is not None and not changed:
+            try:
+                changed = tuple(self._table_stamp(db)) != self._table_marker
+            except Exception as e:
+                print(f"Could not check product_aliases: {e}")
+                db.rollback()
+        if changed or force:
+            self.load(db)
+
+    # ----- matching -----
+    def normalize(self, text: Optional[str], kinds: Iterable[str] = ("product", "brand")) -> Optional[str]:
+        """`text` with every alias of the given kinds replaced by its canonical term."""
+        if not text:
+            return text
+        automaton = self._automaton
+        lowered = text.lower()
+        if len(lowered) != len(text):  # a few Unicode letters change length when lowercased
+            text = lowered
+        pieces, last = [], 0
+        for start, end, alias in automaton.find(lowered):
+            canonical, kind = automaton.payloads[alias]
+            if kind not in kinds:
+                continue
+            pieces.append(text[last:start])
+            pieces.append(canonical)
+            last = end
+        if not pieces:
+            return text
+        self.rewrites += 1
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def canonical_category(self, text: Optional[str]) -> Optional[str]:
+        """The category a whole string is an alias for (e.g. "sabzi"), else None."""
+        if not text:
+            return None
+        entry = self._automaton.payloads.get(text.strip().lower())
+        return entry[0] if entry and entry[1] == "category" else None
+
+    def learn(self, db: Session, alias: str, canonical: str, kind: str = "product"):
+        """Add or update a learned alias and reload right away."""
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        alias = alias.strip().lower()
+        row = db.query(models.ProductAlias).filter(models.ProductAlias.alias == alias).first()
+        if row is None:
+            row = models.ProductAlias(alias=alias)
+            db.add(row)
+        row.canonical = canonical.strip()
+        row.kind = kind
+        row.updated_at = datetime.datetime.utcnow()
+        db.commit()
+        self.load(db)
+
+    def stats(self) -> dict:
+        return {"aliases": len(self._automaton), "reloads": self.reloads, "rewrites": self.rewrites}
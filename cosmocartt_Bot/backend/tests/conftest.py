@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import each other flat (`import models`), as when the API runs from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# `database` refuses to import without a URL; tests that touch a DB make their own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
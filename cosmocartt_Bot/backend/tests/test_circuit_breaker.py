@@ -0,0 +1,85 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, Deadline
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def tripped(failure_threshold=2):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, base_cooldown=2.0, max_cooldown=8.0)
+    for _ in range(failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold(clock):
+    breaker = tripped()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = tripped()
+    clock.now += 2
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_longer_cooldown(clock):
+    breaker = tripped()
+    clock.now += 2
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.cooldown == 4.0
+    clock.now += 2
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+
+
+def test_release_frees_the_probe_slot(clock):
+    breaker = tripped()
+    clock.now += 2
+    assert breaker.allow()
+    # The probe was cancelled: no outcome, but the next caller may probe
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_release_is_a_no_op_when_closed(clock):
+    breaker = CircuitBreaker()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_deadline_clamps_timeouts(clock):
+    deadline = Deadline(5)
+    clock.now += 3
+    assert Deadline.clamp(10, deadline) == pytest.approx(2)
+    assert Deadline.clamp(10, None) == 10
+    clock.now += 3
+    assert deadline.expired
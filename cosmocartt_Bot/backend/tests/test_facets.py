@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import facets
+import models
+
+PRODUCTS = [
+    # product, category, brand, sale_price, is_veg, rating
+    ("Amul Butter", "Dairy", "Amul", 56.0, True, 4.5),
+    ("Amul Taaza Milk", "Dairy", "Amul", 30.0, True, 4.2),
+    ("Mother Dairy Milk", "Dairy", "Mother Dairy", 32.0, True, 3.5),
+    ("Farm Eggs", "Eggs & Meat", "Fresho", 90.0, False, None),
+    ("Basmati Rice", "Foodgrains", "Fortune", 210.0, True, 2.5),
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            models.Product(index=i, product=name, category=category, brand=brand, sale_price=price,
+                           is_veg=veg, rating=rating)
+            for i, (name, category, brand, price, veg, rating) in enumerate(PRODUCTS, start=1)
+        )
+        session.commit()
+        yield session
+
+
+def count(db, **filters):
+    return facets.count(db, db.query(*facets.columns(filters)), filters)
+
+
+def values(result, facet):
+    return {v["value"]: v["count"] for v in result["facets"][facet]}
+
+
+def test_unfiltered_counts(db):
+    result = count(db)
+    assert result["total"] == 5
+    assert values(result, "brand") == {"Amul": 2, "Mother Dairy": 1, "Fresho": 1, "Fortune": 1}
+    assert values(result, "price") == {"0-50": 2, "50-100": 2, "200-500": 1}
+    assert values(result, "rating") == {"4-": 2, "3-4": 1, "0-3": 1, "unrated": 1}
+    assert values(result, "is_veg") == {True: 4, False: 1}
+    # Fixed buckets keep their order, the rest are most common first
+    assert [v["value"] for v in result["facets"]["price"]] == ["0-50", "50-100", "200-500"]
+    assert result["facets"]["brand"][0]["value"] == "Amul"
+
+
+def test_each_facet_ignores_its_own_filter(db):
+    result = count(db, category="Dairy", brand="Amul")
+    assert result["total"] == 2
+    # Other brands within Dairy stay selectable
+    assert values(result, "brand") == {"Amul": 2, "Mother Dairy": 1}
+    # Categories are counted over the Amul rows (every category, not just Dairy)
+    assert values(result, "category") == {"Dairy": 2}
+    assert values(result, "price") == {"0-50": 1, "50-100": 1}
+
+
+def test_bucket_filters(db):
+    result = count(db, **facets.parse_filters(price="50-100", rating="unrated"))
+    assert result["total"] == 1
+    assert values(result, "price") == {"50-100": 1}
+    assert values(result, "rating") == {"4-": 1, "unrated": 1}
+
+
+def test_apply_filters_matches_the_counts(db):
+    filters = facets.parse_filters(brand="Amul", price="0-50")
+    rows = facets.apply_filters(db.query(models.Product.product), filters).all()
+    assert [r.product for r in rows] == ["Amul Taaza Milk"]
+    assert count(db, **filters)["total"] == 1
+
+
+@pytest.mark.parametrize("given, label", [("4+", "4-"), ("4 ", "4-"), ("1000+", "1000-"), ("3-4", "3-4")])
+def test_open_ended_labels(given, label):
+    kind = "price" if given.startswith("1000") else "rating"
+    assert facets.parse_filters(**{kind: given})[kind] == label
+
+
+def test_unknown_bucket():
+    with pytest.raises(ValueError):
+        facets.parse_filters(price="7-9")
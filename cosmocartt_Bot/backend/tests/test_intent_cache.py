@@ -0,0 +1,56 @@
+import pytest
+
+import intent_cache
+from intent_cache import IntentCache
+from llm_schemas import BotResponse
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(intent_cache.time, "time", clock)
+    return clock
+
+
+def tomato():
+    return BotResponse(query_type="PRODUCT_SEARCH", action="search_product", product_name="tomato", confidence=0.9)
+
+
+def test_memory_entry_expires(clock):
+    cache = IntentCache(ttl_seconds=60)
+    cache.set("Show tomatoes!", 1, tomato())
+    assert cache.get("show   tomatoes", 1).product_name == "tomato"
+    assert cache.get("show tomatoes", 2) is None  # another catalog version
+    clock.now += 61
+    assert cache.get("show tomatoes", 1) is None
+
+
+def test_disk_hit_keeps_its_expiry(clock, tmp_path):
+    path = str(tmp_path / "intents.db")
+    IntentCache(ttl_seconds=60, db_path=path).set("show tomatoes", 1, tomato())
+
+    clock.now += 50
+    restarted = IntentCache(ttl_seconds=60, db_path=path)
+    assert restarted.get("show tomatoes", 1) is not None
+    assert restarted.disk_hits == 1
+
+    # Promoted to memory with the stored expiry, not a fresh TTL
+    clock.now += 11
+    assert restarted.get("show tomatoes", 1) is None
+
+
+def test_lru_eviction(clock):
+    cache = IntentCache(max_entries=2, ttl_seconds=60)
+    for word in ("tomato", "curd", "milk"):
+        cache.set(f"show {word}", 1, tomato())
+    assert cache.get("show tomato", 1) is None
+    assert cache.get("show milk", 1) is not None
+    assert cache.evictions == 1
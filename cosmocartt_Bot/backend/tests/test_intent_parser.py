@@ -0,0 +1,93 @@
+import pytest
+
+from intent_parser import RuleBasedIntentParser
+from llm_schemas import QueryType
+from prefetch import build_vocabulary
+from utils import conjunction_pairs
+
+CATEGORIES = ["Fruits & Vegetables", "Dairy", "Snacks"]
+BRANDS = ["Amul", "Mother Dairy"]
+NAMES = ["Tomato", "Amul Butter", "Amul Taaza Milk", "Curd", "Mac and Cheese", "Potato Chips"]
+COMPOUNDS = (conjunction_pairs(NAMES),)
+VOCABULARY = (build_vocabulary(NAMES),)
+
+
+@pytest.fixture
+def parser():
+    return RuleBasedIntentParser()
+
+
+def parse(parser, message):
+    return parser.parse(message, CATEGORIES, BRANDS, COMPOUNDS, VOCABULARY)
+
+
+@pytest.mark.parametrize("message", [
+    "give up",
+    "give me a discount",
+    "pay",
+    "add a",
+    "add the",
+    "show me the money",
+    "find out more",
+    "display settings",
+    "add milk, bread or eggs",
+])
+def test_vague_messages_go_to_the_llm(parser, message):
+    assert parse(parser, message) is None
+
+
+def test_checkout(parser):
+    assert parse(parser, "checkout").query_type == QueryType.CHECKOUT
+    assert parse(parser, "pay now").query_type == QueryType.CHECKOUT
+
+
+def test_cart_add(parser):
+    resp = parse(parser, "add 2 amul butter to my cart")
+    assert resp.query_type == QueryType.CART_ADD
+    assert (resp.product_name, resp.brand, resp.quantity) == ("butter", "Amul", 2)
+
+
+def test_known_conjunction_stays_one_product(parser):
+    resp = parse(parser, "add mac and cheese")
+    assert resp.query_type == QueryType.CART_ADD
+    assert not resp.items
+    assert resp.product_name == "mac and cheese"
+
+
+def test_multi_item_add(parser):
+    resp = parse(parser, "add 2 curd, 1 tomato and mac and cheese")
+    assert resp.query_type == QueryType.CART_ADD
+    assert [(i.product_name, i.quantity) for i in resp.items] == [("curd", 2), ("tomato", 1), ("mac and cheese", 1)]
+
+
+def test_unknown_conjunction_splits(parser):
+    resp = parse(parser, "add curd and tomato")
+    assert [i.product_name for i in resp.items] == ["curd", "tomato"]
+
+
+def test_browse_needs_a_catalog_word(parser):
+    resp = parse(parser, "show me tomatoes")
+    assert resp.query_type == QueryType.PRODUCT_SEARCH
+    assert resp.product_name == "tomato"
+    # A known brand is enough on its own
+    assert parse(parser, "show me amul ghee").brand == "Amul"
+
+
+def test_browse_category(parser):
+    resp = parse(parser, "show me dairy")
+    assert resp.query_type == QueryType.CATEGORY_FILTER
+    assert resp.category == "Dairy"
+
+
+def test_price_filter(parser):
+    resp = parse(parser, "chips under 50")
+    assert resp.max_price == 50
+    resp = parse(parser, "tomato between 10 and 40")
+    assert (resp.min_price, resp.max_price) == (10, 40)
+
+
+def test_hit_rate(parser):
+    parse(parser, "checkout")
+    parse(parser, "give up")
+    assert parser.stats()["hits"] == 1
+    assert parser.stats()["misses"] == 1
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+import pagination
+
+PRODUCTS = [
+    ("Tomato", 30.0), ("Curd", 40.0), ("Amul Butter", 56.0), ("Banana", 40.0),
+    ("Basmati Rice", None), ("Brown Bread", 45.0), ("Corn Flakes", 180.0), (None, 10.0),
+]
+COLUMNS = [models.Product.index, models.Product.product, models.Product.sale_price]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(models.Product(index=i, product=name, sale_price=price, category="Grocery")
+                        for i, (name, price) in enumerate(PRODUCTS, start=1))
+        session.commit()
+        yield session
+
+
+def walk(db, sort, limit):
+    """Every row, following cursors page by page."""
+    seen, cursor = [], None
+    while True:
+        page = pagination.keyset_page(db.query(*COLUMNS), sort, cursor, limit)
+        rows = [dict(index=i, product=p, sale_price=s) for i, p, s in page]
+        cursor = pagination.keyset_next(rows, sort, limit)
+        seen += rows[:limit]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort, key", [
+    ("index", lambda r: r["index"]),
+    ("name", lambda r: (r["product"] or "", r["index"])),
+    ("price", lambda r: (r["sale_price"] or 0.0, r["index"])),
+])
+@pytest.mark.parametrize("limit", [1, 3, 8, 20])
+def test_cursor_walk_returns_every_row_once_in_order(db, sort, key, limit):
+    rows = walk(db, sort, limit)
+    assert [r["index"] for r in rows] == [r["index"] for r in sorted(rows, key=key)]
+    assert sorted(r["index"] for r in rows) == list(range(1, len(PRODUCTS) + 1))
+
+
+def test_cursor_is_bound_to_its_sort(db):
+    rows = [dict(index=i, product=p, sale_price=s) for i, p, s in pagination.keyset_page(db.query(*COLUMNS), "price", None, 2)]
+    cursor = pagination.keyset_next(rows, "price", 2)
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.keyset_page(db.query(*COLUMNS), "name", cursor, 2)
+
+
+def test_malformed_cursor():
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.decode("not a cursor")
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.offset_of(pagination.encode({"s": "index", "i": 3}))
+
+
+def test_offset_cursor_round_trip():
+    assert pagination.offset_of(None) == 0
+    cursor = pagination.offset_next(40, 21, 20)
+    assert pagination.offset_of(cursor) == 60
+    assert pagination.offset_next(40, 20, 20) is None
@@ -0,0 +1,41 @@
+import pytest
+
+from spelling import SpellingIndex, edit_distance
+
+NAMES = ["Tomato", "Tomato Ketchup", "Amul Butter", "Basmati Rice", "Sona Masoori Rice", "Potato Chips", "Curd"]
+
+
+@pytest.fixture
+def spelling():
+    return SpellingIndex.from_names(NAMES)
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("tomato", "tomato", 0), ("tomatoe", "tomato", 1), ("tomtao", "tomato", 1), ("basmti", "basmati", 1),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 2) == distance
+
+
+def test_known_words_are_kept(spelling):
+    assert spelling.lookup("Tomato") == "tomato"
+    assert spelling.correct("tomato ketchup") is None
+
+
+@pytest.mark.parametrize("typo, fixed", [("tomatoe", "tomato"), ("basmti rice", "basmati rice"), ("ketchap", "ketchup")])
+def test_typos_are_corrected(spelling, typo, fixed):
+    assert spelling.correct(typo) == fixed
+
+
+def test_short_and_unrelated_words_are_left_alone(spelling):
+    # Four letters allow one edit only (a swap counts as one), and three or fewer none at all
+    assert spelling.lookup("crud") == "curd"
+    assert spelling.lookup("cuds") is None
+    assert spelling.lookup("xyz") is None
+    assert spelling.correct("laptop") is None
+
+
+def test_more_common_word_wins_ties():
+    # "dice" is one edit from both; rice is used by more names
+    spelling = SpellingIndex.from_names(["Basmati Rice", "Brown Rice", "Ice Cream", "Mice Trap"])
+    assert spelling.lookup("dice") == "rice"
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+from synonyms import AhoCorasick, AliasMatcher
+
+ALIASES = {
+    "product": {"curd": ["dahi", "yogurt"], "atta": ["wheat flour"], "flour": ["aata"]},
+    "brand": {"Aashirvaad": ["ashirvad"]},
+    "category": {"Fruits & Vegetables": ["sabzi"]},
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps(ALIASES))
+    return str(path)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_whole_words_only():
+    automaton = AhoCorasick({"dahi": 1, "wheat flour": 2, "flour": 3})
+    assert [alias for _, _, alias in automaton.find("dahi and wheat flour")] == ["dahi", "wheat flour"]
+    assert automaton.find("dahiwala") == []
+
+
+def test_normalize_by_kind(path):
+    aliases = AliasMatcher(path)
+    assert aliases.normalize("ashirvad dahi") == "Aashirvaad curd"
+    assert aliases.normalize("ashirvad dahi", kinds=("brand",)) == "Aashirvaad dahi"
+    assert aliases.normalize("wheat flour") == "atta"
+    assert aliases.canonical_category("Sabzi") == "Fruits & Vegetables"
+    assert aliases.canonical_category("dahi") is None
+
+
+def test_learned_aliases_load_on_the_first_reload(path, db):
+    db.add(models.ProductAlias(alias="tamatar", canonical="tomato", kind="product"))
+    db.commit()
+    aliases = AliasMatcher(path, reload_seconds=3600)
+    assert aliases.normalize("tamatar") == "tamatar"
+    aliases.maybe_reload(db)
+    assert aliases.normalize("tamatar") == "tomato"
+
+
+def test_learn_applies_immediately(path, db):
+    aliases = AliasMatcher(path, reload_seconds=3600)
+    aliases.learn(db, "Bhindi", "ladies finger")
+    assert aliases.normalize("bhindi") == "ladies finger"
+    assert "finger" in aliases.words
+    with pytest.raises(ValueError):
+        aliases.learn(db, "x", "y", kind="colour")
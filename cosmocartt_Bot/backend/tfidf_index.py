@@ -0,0 +1,139 @@
+"""
+Vectorized product-name similarity: character n-gram TF-IDF.
+
+`utils.similarity` runs a pure-Python `SequenceMatcher` per (query, name) pair. This
+engine builds a sparse TF-IDF matrix of every catalog name once (padded word trigrams,
+sublinear tf, smoothed idf, L2-normalized rows), so scoring a query against the whole
+catalog is one sparse matrix-vector product followed by a top-k selection, and a batch of
+queries is one sparse matrix-matrix product.
+
+Needs `numpy` and `scipy`; when they are missing `TfidfIndex.available` is False and
+callers keep using `utils.similarity`. `scripts/benchmark_similarity.py` compares both.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import re
+
+try:
+    import numpy as np
+    from scipy import sparse
+except Exception:
+    np = None
+    sparse = None
+
+
+def _ngrams(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            g = padded[i:i + 3]
+            counts[g] = counts.get(g, 0) + 1
+    return counts
+
+
+class TfidfIndex:
+    available = np is not None and sparse is not None
+
+    def __init__(self, rows: Iterable[Tuple[int, str]]):
+        if not self.available:
+            raise RuntimeError("TfidfIndex needs numpy and scipy")
+        self.ids: List[int] = []
+        self.names: List[str] = []
+        docs = []
+        for pid, name in rows:
+            if name:
+                self.ids.append(pid)
+                self.names.append(name)
+                docs.append(_ngrams(name))
+        self._row_of = {pid: i for i, pid in enumerate(self.ids)}
+
+        vocab: Dict[str, int] = {}
+        df: List[int] = []
+        for doc in docs:
+            for g in doc:
+                col = vocab.get(g)
+                if col is None:
+                    vocab[g] = len(df)
+                    df.append(1)
+                else:
+                    df[col] += 1
+        self.vocab = vocab
+        n_docs = len(docs)
+        self.idf = np.log((1.0 + n_docs) / (1.0 + np.asarray(df, dtype=np.float64))) + 1.0
+        # Weight for query n-grams the catalog has never seen (they still lower the match)
+        self.unseen_idf = math.log(1.0 + n_docs) + 1.0
+        self.matrix = self._to_matrix(docs, add_unseen=False)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _to_matrix(self, docs: Sequence[Dict[str, int]], add_unseen: bool = True):
+        indptr, indices, data = [0], [], []
+        for doc in docs:
+            unseen_sq = 0.0
+            weights = []
+            for g, tf in doc.items():
+                w = 1.0 + math.log(tf)
+                col = self.vocab.get(g)
+                if col is None:
+                    if add_unseen:
+                        unseen_sq += (w * self.unseen_idf) ** 2
+                    continue
+                indices.append(col)
+                weights.append(w * self.idf[col])
+            norm = math.sqrt(sum(w * w for w in weights) + unseen_sq) or 1.0
+            data.extend(w / norm for w in weights)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(docs), len(self.vocab)),
+        )
+
+    def _top(self, scores, k: int) -> List[Tuple[str, float, int]]:
+        if scores.size == 0:
+            return []
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.names[i], float(scores[i]), self.ids[i]) for i in top if scores[i] > 0]
+
+    def top_k(self, query: str, k: int = 5) -> List[Tuple[str, float, int]]:
+        """Up to `k` (name, cosine, id) tuples for `query`, best first."""
+        q = self._to_matrix([_ngrams(query)])
+        scores = (self.matrix @ q.T).toarray().ravel()
+        return self._top(scores, k)
+
+    def top_k_batch(self, queries: Sequence[str], k: int = 5) -> List[List[Tuple[str, float, int]]]:
+        """`top_k` for many queries with a single sparse product."""
+        if not queries:
+            return []
+        q = self._to_matrix([_ngrams(s) for s in queries])
+        scores = (q @ self.matrix.T).tocsr()
+        results = []
+        for row in range(len(queries)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            cols, vals = scores.indices[start:end], scores.data[start:end]
+            kk = min(k, len(vals))
+            if kk == 0:
+                results.append([])
+                continue
+            top = np.argpartition(-vals, kk - 1)[:kk]
+            top = top[np.argsort(-vals[top], kind="stable")]
+            results.append([(self.names[cols[i]], float(vals[i]), self.ids[cols[i]]) for i in top])
+        return results
+
+    def score_ids(self, query: str, ids: Sequence[int]) -> List[Optional[float]]:
+        """Cosine between `query` and each product id (None for ids not in the index)."""
+        rows = [self._row_of.get(pid) for pid in ids]
+        known = [r for r in rows if r is not None]
+        if not known:
+            return [None] * len(ids)
+        q = self._to_matrix([_ngrams(query)])
+        scores = (self.matrix[known] @ q.T).toarray().ravel()
+        by_row = dict(zip(known, scores.tolist()))
+        return [by_row[r] if r is not None else None for r in rows]
+
+    def stats(self) -> dict:
+        return {"products": len(self.ids), "ngrams": len(self.vocab), "nnz": int(self.matrix.nnz)}
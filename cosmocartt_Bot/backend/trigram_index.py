@@ -0,0 +1,150 @@
+"""
+Character-trigram inverted index over product names.
+
+`utils.match_or_suggest` scores every candidate with `SequenceMatcher`, which is O(N) per
+lookup, so the agent could only afford to match against a 30-product sample. This index
+covers the whole catalog:
+
+1. candidate generation: each name is split into padded word trigrams (as pg_trgm does);
+   names are pooled from the query's posting lists, rarest first, up to `max_pool` (a
+   pool that is still too broad is narrowed to names sharing the next trigram too), and
+   ranked by Dice overlap of their trigram sets.
+2. scoring: only the top `rerank` candidates get the exact `utils.similarity` ratio, so
+   scores and thresholds mean the same thing as before.
+
+The index is kept in sync incrementally: `sync(rows)` diffs the current (id, name) rows
+against what is indexed and only re-indexes names that were added, renamed or removed.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import re
+import heapq
+import threading
+
+from utils import similarity
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    grams = set()
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    def __init__(self, rerank: int = 10, max_pool: int = 200):
+        self.rerank = rerank
+        self.max_pool = max_pool
+        self._names: Dict[int, str] = {}
+        self._grams: Dict[int, FrozenSet[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        self.syncs = 0
+        self.last_changes = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    # ----- maintenance -----
+    def _add(self, pid: int, name: str):
+        grams = trigrams(name)
+        self._names[pid] = name
+        self._grams[pid] = grams
+        for g in grams:
+            self._postings.setdefault(g, set()).add(pid)
+
+    def _remove(self, pid: int):
+        self._names.pop(pid, None)
+        for g in self._grams.pop(pid, ()):
+            posting = self._postings.get(g)
+            if posting is not None:
+                posting.discard(pid)
+                if not posting:
+                    del self._postings[g]
+
+    def upsert(self, pid: int, name: str):
+        with self._lock:
+            if self._names.get(pid) == name:
+                return
+            self._remove(pid)
+            if name:
+                self._add(pid, name)
+
+    def remove(self, pid: int):
+        with self._lock:
+            self._remove(pid)
+
+    def sync(self, rows: Iterable[Tuple[int, str]]) -> int:
+        """Make the index match `rows` (all current (id, name) pairs). Returns the number of changes."""
+        seen, changed = set(), []
+        for pid, name in rows:
+            seen.add(pid)
+            if self._names.get(pid) != name:
+                changed.append((pid, name))
+        with self._lock:
+            removed = [pid for pid in self._names if pid not in seen]
+            for pid in removed:
+                self._remove(pid)
+            for pid, name in changed:
+                self._remove(pid)
+                if name:
+                    self._add(pid, name)
+        self.syncs += 1
+        self.last_changes = len(removed) + len(changed)
+        return self.last_changes
+
+    # ----- lookups -----
+    def _candidates(self, query_grams: FrozenSet[str], limit: int) -> List[int]:
+        # Pool names from the rarest postings first: a name sharing rare trigrams with the
+        # query is a better candidate, and the pool (hence the scoring work) stays bounded
+        postings = sorted((self._postings[g] for g in query_grams if g in self._postings), key=len)
+        pool: Set[int] = set()
+        for posting in postings:
+            if not pool or len(pool) + len(posting) <= self.max_pool:
+                pool |= posting
+            elif len(pool) > self.max_pool:
+                # Too broad: keep only names that also share this trigram
+                pool = (pool & posting) or pool
+            else:
+                break
+        q = len(query_grams)
+        grams = self._grams
+        return heapq.nlargest(limit, pool, key=lambda pid: 2.0 * len(query_grams & grams[pid]) / (q + len(grams[pid])))
+
+    def search(self, name: str, limit: int = 5) -> List[Tuple[str, float, int]]:
+        """Up to `limit` (name, similarity, id) tuples, best first."""
+        query_grams = trigrams(name)
+        if not query_grams:
+            return []
+        with self._lock:
+            pids = self._candidates(query_grams, max(self.rerank, limit))
+            names = [(self._names[pid], pid) for pid in pids]
+        scored = [(n, similarity(name, n), pid) for n, pid in names]
+        scored.sort(key=lambda t: t[1], reverse=True)
+        return scored[:limit]
+
+    def find_similar(self, name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Same contract as `utils.find_similar_products`, over the whole catalog."""
+        return [(n, s) for n, s, _ in self.search(name, limit)]
+
+    def match_or_suggest(self, name: str, exact_threshold: float = 0.95,
+                         suggest_threshold: float = 0.6) -> Tuple[Optional[str], Optional[str], float]:
+        """Same contract as `utils.match_or_suggest`, over the whole catalog."""
+        best = self.search(name, 1)
+        if not best:
+            return None, None, 0.0
+        best_name, best_score, _ = best[0]
+        if best_score >= exact_threshold:
+            return best_name, None, best_score
+        if best_score >= suggest_threshold:
+            return None, best_name, best_score
+        return None, None, best_score
+
+    def stats(self) -> dict:
+        return {
+            "products": len(self._names),
+            "trigrams": len(self._postings),
+            "syncs": self.syncs,
+            "last_changes": self.last_changes,
+        }
@@ -1,5 +1,9 @@
 from difflib import SequenceMatcher, get_close_matches
-from typing import List, Tuple, Optional
+from typing import FrozenSet, Iterable, List, Tuple, Optional
+import re
+
+# "mac and cheese": the words either side of a conjunction (lookahead, so pairs can chain)
+CONJUNCTION_PAIR_RE = re.compile(r"([a-z0-9']+)\s+(?:and|&)\s+(?=([a-z0-9']+))")
 
 
 def similarity(a: str, b: str) -> float:
@@ -41,3 +45,13 @@ def match_or_suggest(name: str, products: List[str], exact_threshold: float = 0.
     if best_score >= suggest_threshold:
         return None, best, best_score
     return None, None, best_score
+
+
+def conjunction_pairs(names: Iterable[str]) -> FrozenSet[str]:
+    """Every "<word> and <word>" pair inside `names` ("mac and cheese", "salt & pepper"
+    as "salt and pepper"). Multi-item messages are never split inside one of them."""
+    pairs = set()
+    for name in names:
+        for m in CONJUNCTION_PAIR_RE.finditer((name or "").lower()):
+            pairs.add(f"{m.group(1)} and {m.group(2)}")
+    return frozenset(pairs)
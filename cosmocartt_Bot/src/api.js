@@ -6,8 +6,24 @@ export const BASE_URL = import.meta.env.VITE_API_URL || (
 
 console.log("🚀 API BASE URL:", BASE_URL); // Debugging
 
+// Frontend field -> backend column it comes from; compact projections leave some out
+const SOURCE_FIELDS = {
+    name: 'product', baseName: 'product', category: 'category', subCategory: 'sub_category',
+    image: 'image_url', isVeg: 'is_veg', rating: 'rating', description: 'description',
+    unitType: 'unit_type', brand: 'brand'
+};
+
 // Helper to map Backend DB structure to Frontend structure
-const mapProduct = (p) => ({
+const mapProduct = (p) => {
+    const mapped = mapFullProduct(p);
+    // Don't invent defaults (rating 4.5, placeholder image...) for columns that weren't sent
+    for (const [field, column] of Object.entries(SOURCE_FIELDS)) {
+        if (!(column in p)) delete mapped[field];
+    }
+    return mapped;
+};
+
+const mapFullProduct = (p) => ({
     id: p.index,
     name: p.product,
     baseName: p.product, // Simplified
@@ -15,7 +31,7 @@ const mapProduct = (p) => ({
     subCategory: p.sub_category, // Added for filtering
     price: p.sale_price,
     originalPrice: p.market_price,
-    image: p.image_url || ('https://placehold.co/400?text=' + encodeURIComponent(p.category)),
+    image: p.image_url || ('https://placehold.co/400?text=' + encodeURIComponent(p.category ?? p.product ?? '')),
     isVeg: (() => {
         if (p.is_veg === false) return false;
         const nonVegKeywords = ['chicken', 'meat', 'fish', 'prawn', 'shrimp', 'crab', 'egg', 'mutton', 'pork', 'seafood', 'beef', 'duck'];
@@ -31,6 +47,23 @@ const mapProduct = (p) => ({
     discount: p.market_price > p.sale_price ? Math.round(((p.market_price - p.sale_price) / p.market_price) * 100) : 0
 });
 
+// Same multipliers as the weight picker in the order preview
+const weightMultiplier = (weight = '') => weight.includes('500') ? 0.55 : weight.includes('250') ? 0.30 : 1;
+
+// A cart or order line with today's name, price and image from a getProductsByIds row
+// (unchanged if the product is gone); weight variants keep their price multiplier
+export const refreshItem = (item, current) => {
+    if (!current) return item;
+    const multiplier = weightMultiplier(item.selectedWeight || item.weight || '');
+    return {
+        ...item,
+        name: current.name,
+        price: multiplier === 1 ? current.price : Math.floor(current.price * multiplier),
+        image: current.image,
+        image_url: current.image
+    };
+};
+
 export const api = {
     // 1. Search Products
     searchProducts: async (query) => {
@@ -89,14 +122,34 @@ export const api = {
         }
     },
 
+    // 3.6 Current rows for many products in one request (cart refresh, reorder).
+    // Unknown ids are left out of the result.
+    getProductsByIds: async (ids, fields = 'compact') => {
+        if (!ids.length) return [];
+        try {
+            const res = await fetch(`${BASE_URL}/products/batch?fields=${encodeURIComponent(fields)}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ ids })
+            });
+            if (!res.ok) throw new Error('Batch lookup failed');
+            const data = await res.json();
+            return data.map(mapProduct);
+        } catch (e) {
+            console.error("Batch product fetch failed:", e);
+            return [];
+        }
+    },
+
 
     // 4. Chat - AI Powered
-    chat: async (message) => {
+    // userId lets the backend answer follow-ups ("add two of those") from the last reply
+    chat: async (message, userId) => {
         try {
             const res = await fetch(`${BASE_URL}/api/chat`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message })
+                body: JSON.stringify({ message, user_id: userId || null })
             });
             if (!res.ok) throw new Error('Chat API failed');
             return await res.json();
@@ -109,6 +162,47 @@ export const api = {
         }
     },
 
+    // 4.5 Chat (streaming) - Server-Sent Events from /api/chat/stream.
+    // onIntent fires as soon as the message is parsed, onProduct once per resolved row.
+    // Resolves with the same payload as chat(); falls back to chat() if streaming fails.
+    chatStream: async (message, { onIntent, onProduct, userId } = {}) => {
+        try {
+            const res = await fetch(`${BASE_URL}/api/chat/stream`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+                body: JSON.stringify({ message, user_id: userId || null })
+            });
+            if (!res.ok || !res.body) throw new Error('Chat stream failed');
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let final = null;
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let sep;
+                while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, sep);
+                    buffer = buffer.slice(sep + 2);
+                    const event = (block.match(/^event: (.*)$/m) || [])[1];
+                    const data = (block.match(/^data: (.*)$/m) || [])[1];
+                    if (!event || !data) continue;
+                    const payload = JSON.parse(data);
+                    if (event === 'intent' && onIntent) onIntent(payload);
+                    else if (event === 'product' && onProduct) onProduct(payload);
+                    else if (event === 'final') final = payload;
+                }
+            }
+            if (!final) throw new Error('Chat stream ended without a result');
+            return final;
+        } catch (e) {
+            console.error("Chat stream failed, retrying without streaming:", e);
+            return api.chat(message, userId);
+        }
+    },
+
     async createOrder(orderData) {
         try {
             const res = await fetch(`${BASE_URL}/orders`, {
@@ -1,9 +1,10 @@
 import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
-import { BASE_URL } from '../api';
+import { BASE_URL, api, refreshItem } from '../api';
 // import { PRODUCT_DB, DAILY_ESSENTIALS } from '../data/mockData'; // MOCK DATA REMOVED
 
 const CartContext = createContext();
 
+
 export const CartProvider = ({ children, userId }) => {
   const [cart, setCart] = useState([]);
   const [isFetched, setIsFetched] = useState(false);
@@ -67,6 +68,13 @@ export const CartProvider = ({ children, userId }) => {
               image_url: item.image_url
             }));
             setCart(loadedCart);
+
+            // Saved prices and images go stale: refresh every line in one request
+            const current = await api.getProductsByIds(loadedCart.map(item => item.id));
+            if (current.length > 0) {
+              const byId = new Map(current.map(p => [p.id, p]));
+              setCart(prev => prev.map(item => refreshItem(item, byId.get(item.id))));
+            }
           }
         } catch (err) {
           console.error("Failed to fetch cart:", err);
@@ -1,7 +1,7 @@
 import { useState, useRef } from 'react';
 import { RECIPES } from '../data/staticContent'; // New Static Content
 // import { SARAH_HISTORY, CATEGORIES } from '../data/mockData'; // DELETED
-import { api } from '../api';
+import { api, refreshItem } from '../api';
 import { useCart } from '../context/CartContext';
 
 export const useChatLogic = (user, dynamicCategories = []) => {
@@ -390,7 +390,7 @@ export const useChatLogic = (user, dynamicCategories = []) => {
 
         try {
             // Call Backend LLM Service
-            const response = await api.chat(text);
+            const response = await api.chat(text, user.id);
             setIsTyping(false);
 
             if (!response.success && response.query_type === 'UNKNOWN') {
@@ -417,8 +417,31 @@ export const useChatLogic = (user, dynamicCategories = []) => {
             else if (response.query_type === 'CART_ADD') {
                 const qtyToAdd = response.quantity || 1;
 
+                // Several products in one message — backend resolved them all in one go
+                if (response.items && response.items.length > 0) {
+                    response.items.forEach(({ product: p, quantity, weight }) => {
+                        const product = {
+                            ...p,
+                            baseName: p.name,
+                            price: p.sale_price,
+                            perUnitSellingPrice: p.sale_price,
+                            perUnitOriginalPrice: p.market_price,
+                            isVeg: p.is_veg,
+                            unitType: p.unit_type,
+                            image: p.image_url || ('https://placehold.co/400?text=' + encodeURIComponent(p.category || 'Product'))
+                        };
+                        if (weight && (product.unitType === 'kg' || product.unitType === 'l')) {
+                            product.selectedWeight = weight;
+                        }
+                        const variantId = `${product.id}-${product.selectedWeight || 'std'}`;
+                        const existingItem = cart.find(c => `${c.id}-${c.selectedWeight}` === variantId);
+                        updateQuantity(product, (existingItem ? existingItem.quantity : 0) + (quantity || 1));
+                    });
+                    addMsg('bot', response.message, 'success');
+                }
+
                 // Backend already resolved the product — use it directly if available
-                if (response.success && response.product) {
+                else if (response.success && response.product) {
                     const p = response.product;
                     const product = {
                         ...p,
@@ -651,15 +674,18 @@ export const useChatLogic = (user, dynamicCategories = []) => {
                     const history = await api.getOrders(user.id);
 
                     if (history && history.length > 0) {
+                        // Reorder at today's prices: all items refreshed in one request
+                        const current = new Map((await api.getProductsByIds(history[0].items.map(i => i.product_id))).map(p => [p.id, p]));
                         // Extract items from last order for reorder
-                        const lastOrderItems = history[0].items.map(i => ({
+                        const lastOrderItems = history[0].items.map(i => refreshItem({
                             id: i.product_id,
                             name: i.product_name,
                             baseName: i.product_name, // Fallback
                             price: i.price,
                             quantity: i.quantity,
+                            weight: i.weight,
                             image: i.image_url
-                        }));
+                        }, current.get(i.product_id)));
 
                         addMsg('bot', `Welcome back, ${user.name}! I found your recent order.`);
                         setTimeout(() => {
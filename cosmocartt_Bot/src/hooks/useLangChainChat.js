@@ -1,4 +1,5 @@
 import { useState, useCallback } from 'react';
+import { api } from '../api';
 
 /**
  * Custom hook for integrating LangChain LLM chat functionality
@@ -6,6 +7,7 @@ import { useState, useCallback } from 'react';
  * 
  * Returns:
  * - processQuery: Function to send user queries to the LLM service
+ * - streamQuery: Streaming variant (/api/chat/stream) with progressive callbacks
  * - isLoading: Boolean indicating if request is in progress
  * - error: String error message if request failed
  */
@@ -52,8 +54,38 @@ export const useLangChainChat = () => {
         }
     }, []);
 
+    /**
+     * Stream a user query through /api/chat/stream
+     *
+     * @param {string} userMessage - The user's query/message
+     * @param {Object} handlers - { onIntent(intent), onProduct(row) } called as events arrive,
+     *                            plus an optional userId for follow-up context
+     * @returns {Promise<Object>} - The final response (same shape as processQuery)
+     */
+    const streamQuery = useCallback(async (userMessage, handlers = {}) => {
+        setIsLoading(true);
+        setError(null);
+
+        try {
+            const onIntent = (intent) => {
+                // The first byte is in: stop showing the spinner, rows follow
+                setIsLoading(false);
+                if (handlers.onIntent) handlers.onIntent(intent);
+            };
+            return await api.chatStream(userMessage, { onIntent, onProduct: handlers.onProduct, userId: handlers.userId });
+        } catch (err) {
+            const errorMessage = err.message || 'Failed to process query';
+            setError(errorMessage);
+            console.error('Error streaming query:', errorMessage);
+            return null;
+        } finally {
+            setIsLoading(false);
+        }
+    }, []);
+
     return {
         processQuery,
+        streamQuery,
         isLoading,
         error
     };